@@ -0,0 +1,221 @@
+import asyncio
+import hashlib
+import json
+import pathlib
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Optional, Tuple
+
+from app.config import ARTIFACT_DIR, ARTIFACT_POLL_SECONDS, MODEL_FILE, MODEL_THREADS, PREPROCESSING_FILE
+from app.features import FeaturePipeline
+from app.metrics import MODEL_INFO, STAGE_LATENCY
+from app.tree_model import TreeEnsemble
+
+# FILES WRITTEN BY THE TRAINING PIPELINE. THE EXPORTED TREES ARE SERVED WITH THE SCALER AND ENCODER
+# PARAMETERS FROM preprocessing.json, SO THAT PATH NEEDS NEITHER SCIKIT-LEARN NOR JOBLIB
+if MODEL_FILE.endswith(".trees"):
+    ARTIFACT_FILES = {
+        "model": MODEL_FILE,
+        "preprocessing": PREPROCESSING_FILE,
+    }
+else:
+    ARTIFACT_FILES = {
+        "model": MODEL_FILE,
+        "scaler": "scaler.pkl",
+        "encoder": "encoder.pkl",
+    }
+
+# WRITTEN BY THE TRAINING PIPELINE AFTER EVERY OTHER ARTIFACT, WITH THE SHA-256 OF EACH ONE.
+# A NEW MANIFEST IS WHAT TELLS THE SERVER THAT A COMPLETE SET IS READY
+MANIFEST_FILE = "artifacts.json"
+
+
+def load_artifact(path: pathlib.Path) -> Any:
+    """
+    This function is responsible for loading one artifact based on its file type.
+
+    Parameters:
+        - path: Path to the artifact
+
+    Returns:
+        - The loaded object
+    """
+    if path.suffix == ".trees":
+        return TreeEnsemble.load(path)
+    if path.suffix == ".json":
+        return json.loads(path.read_text())
+
+    # ONLY THE PICKLED ARTIFACTS NEED JOBLIB, THE SLIM IMAGE DOES NOT INSTALL IT
+    import joblib
+
+    artifact = joblib.load(path)
+    if hasattr(artifact, "get_booster"):
+        # KEEP EACH SERVER PROCESS TO ITS SHARE OF THE CORES
+        artifact.set_params(n_jobs=MODEL_THREADS)
+    return artifact
+
+
+@dataclass(frozen=True)
+class Artifacts:
+    """
+    Immutable snapshot of the model, scaler and encoder that were loaded together.
+    The scaler and encoder are None when the feature pipeline was built from preprocessing.json.
+    """
+    model: Any
+    scaler: Optional[Any]
+    encoder: Optional[Any]
+    features: FeaturePipeline
+    version: str
+    loaded_at: datetime
+
+
+class ArtifactRegistry:
+    """
+    This class is responsible for keeping the trained artifacts in memory and
+    swapping them out when the training pipeline publishes a new manifest.
+    """
+
+    def __init__(self, directory: str = ".", poll_interval: float = 5.0):
+        self.directory = pathlib.Path(directory)
+        self.poll_interval = poll_interval
+        self._current: Optional[Artifacts] = None
+        self._fingerprint: Optional[Tuple] = None
+        self._lock = threading.Lock()
+
+    def _paths(self):
+        return {name: self.directory / filename for name, filename in ARTIFACT_FILES.items()}
+
+    def _file_stats(self) -> Optional[Tuple]:
+        # (mtime_ns, size) OF EVERY ARTIFACT, None IF ANY IS MISSING
+        try:
+            return tuple(
+                (stat.st_mtime_ns, stat.st_size)
+                for stat in (path.stat() for path in self._paths().values())
+            )
+        except FileNotFoundError:
+            return None
+
+    def fingerprint(self) -> Optional[Tuple]:
+        """
+        This function is responsible for reading the mtime and size of the manifest.
+
+        Returns:
+            - (mtime_ns, size) of the manifest, or None if there is no manifest
+        """
+        try:
+            stat = (self.directory / MANIFEST_FILE).stat()
+            return stat.st_mtime_ns, stat.st_size
+        except FileNotFoundError:
+            return None
+
+    def read_manifest(self) -> Optional[dict]:
+        """
+        This function is responsible for reading the checksums the training run recorded.
+
+        Returns:
+            - Dictionary of file name to SHA-256, or None if there is no manifest
+        """
+        path = self.directory / MANIFEST_FILE
+        if not path.exists():
+            return None
+        return json.loads(path.read_text())["files"]
+
+    def load(self) -> Artifacts:
+        """
+        This function is responsible for loading all the artifacts and publishing them as one snapshot.
+        When there is a manifest, every file has to match its checksum, so a set that is still being
+        written (e.g. a new encoder next to the old model) is rejected instead of served.
+
+        Returns:
+            - The newly loaded Artifacts
+        """
+        with self._lock, STAGE_LATENCY.time("artifact_load"):
+            manifest_fingerprint = self.fingerprint()
+            manifest = self.read_manifest()
+            before = self._file_stats()
+            if before is None:
+                raise FileNotFoundError(f"Missing artifacts in {self.directory.resolve()}")
+
+            digest = hashlib.sha256()
+            loaded = {}
+            for name, path in self._paths().items():
+                content = path.read_bytes()
+                if manifest is not None and hashlib.sha256(content).hexdigest() != manifest.get(path.name):
+                    raise RuntimeError(f"{path.name} does not match {MANIFEST_FILE}")
+                digest.update(content)
+                loaded[name] = load_artifact(path)
+
+            # THE FILES CHANGED WHILE WE WERE READING THEM, SO THE SET MAY BE MIXED
+            if self._file_stats() != before:
+                raise RuntimeError("Artifacts changed while loading")
+
+            if "preprocessing" in loaded:
+                features = FeaturePipeline.from_params(loaded["preprocessing"])
+            else:
+                features = FeaturePipeline.from_fitted(loaded["encoder"], loaded["scaler"])
+
+            artifacts = Artifacts(
+                model=loaded["model"],
+                scaler=loaded.get("scaler"),
+                encoder=loaded.get("encoder"),
+                features=features,
+                version=digest.hexdigest()[:12],
+                loaded_at=datetime.now(),
+            )
+
+            # SINGLE REFERENCE ASSIGNMENT, READERS SEE EITHER THE OLD OR THE NEW SET
+            self._current = artifacts
+            self._fingerprint = manifest_fingerprint
+
+            MODEL_INFO.clear()
+            MODEL_INFO.set(1, artifacts.version)
+
+            return artifacts
+
+    def get(self) -> Artifacts:
+        """
+        This function is responsible for returning the current artifacts.
+
+        Returns:
+            - The Artifacts currently being served
+        """
+        artifacts = self._current
+        if artifacts is None:
+            raise RuntimeError("Artifacts have not been loaded")
+        return artifacts
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._current is not None
+
+    def refresh(self) -> bool:
+        """
+        This function is responsible for reloading the artifacts when a new manifest appears.
+        Training writes the manifest last, so the files it lists are complete by then. If they do not
+        match it (e.g. they are still being copied in), the load is retried on the next poll.
+
+        Returns:
+            - True if new artifacts were loaded, otherwise False
+        """
+        current = self.fingerprint()
+        if current is None or current == self._fingerprint:
+            return False
+
+        try:
+            self.load()
+            return True
+        except Exception as e:
+            print(f'Error in refresh: {e}')
+            return False
+
+    async def watch(self):
+        """
+        This function is responsible for polling the manifest until it is cancelled.
+        """
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            await asyncio.to_thread(self.refresh)
+
+
+registry = ArtifactRegistry(directory=ARTIFACT_DIR, poll_interval=ARTIFACT_POLL_SECONDS)
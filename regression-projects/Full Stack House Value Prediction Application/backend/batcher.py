@@ -0,0 +1,186 @@
+import asyncio
+import time
+from bisect import bisect_left
+from typing import Any, Awaitable, Callable, List, Sequence
+
+import numpy as np
+
+from app.executor import PoolSaturated
+
+# UPPER BOUNDS (IN MILLISECONDS) OF THE QUEUEING DELAY HISTOGRAM
+DELAY_BUCKETS_MS = (0.5, 1, 2, 5, 10, 25, 50, 100, 250)
+
+
+class BatcherMetrics:
+    """
+    This class is responsible for keeping track of batch sizes and queueing delays.
+    """
+
+    def __init__(self, max_batch_size: int):
+        # POWERS OF TWO UP TO THE LARGEST BATCH WE CAN FORM
+        self.size_buckets = []
+        bound = 1
+        while bound < max_batch_size:
+            self.size_buckets.append(bound)
+            bound *= 2
+        self.size_buckets.append(max_batch_size)
+
+        self.size_counts = [0] * len(self.size_buckets)
+        self.delay_counts = [0] * (len(DELAY_BUCKETS_MS) + 1)
+        self.batches = 0
+        self.rows = 0
+        self.split_batches = 0
+        self.delay_sum_ms = 0.0
+        self.delay_max_ms = 0.0
+
+    def record_batch(self, size: int, delays_ms: Sequence[float]):
+        self.batches += 1
+        self.rows += size
+        self.size_counts[bisect_left(self.size_buckets, size)] += 1
+
+        for delay in delays_ms:
+            self.delay_counts[bisect_left(DELAY_BUCKETS_MS, delay)] += 1
+            self.delay_sum_ms += delay
+            self.delay_max_ms = max(self.delay_max_ms, delay)
+
+    def snapshot(self) -> dict:
+        """
+        This function is responsible for returning the metrics as plain Python types.
+
+        Returns:
+            - Dictionary with the batch size and queueing delay distributions
+        """
+        return {
+            "batches": self.batches,
+            "rows": self.rows,
+            "mean_batch_size": round(self.rows / self.batches, 2) if self.batches else 0,
+            "split_batches": self.split_batches,
+            "batch_size_histogram": {
+                f"le_{bound}": count for bound, count in zip(self.size_buckets, self.size_counts)
+            },
+            "queue_delay_ms": {
+                "mean": round(self.delay_sum_ms / self.rows, 3) if self.rows else 0,
+                "max": round(self.delay_max_ms, 3),
+                "histogram": {
+                    **{f"le_{bound}": count for bound, count in zip(DELAY_BUCKETS_MS, self.delay_counts)},
+                    "le_inf": self.delay_counts[-1],
+                },
+            },
+        }
+
+
+class MicroBatcher:
+    """
+    This class is responsible for coalescing concurrent single-house requests into one
+    vectorized model call. A batch is flushed once it reaches max_batch_size rows or the
+    oldest request has waited max_wait_ms, whichever happens first.
+    """
+
+    def __init__(
+        self,
+        score_fn: Callable[[List[Any]], Awaitable[np.ndarray]],
+        max_batch_size: int = 64,
+        max_wait_ms: float = 2.0,
+    ):
+        self.score_fn = score_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.metrics = BatcherMetrics(max_batch_size)
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._in_flight = set()
+
+    async def submit(self, item: Any) -> float:
+        """
+        This function is responsible for queueing one item and waiting for its own prediction.
+
+        Parameters:
+            - item: The record to score
+
+        Returns:
+            - The prediction for that record
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self) -> list:
+        # BLOCK UNTIL THE FIRST REQUEST ARRIVES, THEN START THE CLOCK
+        batch = [await self._queue.get()]
+        deadline = batch[0][2] + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            # TAKE WHATEVER IS ALREADY WAITING, EVEN IF THE DEADLINE HAS PASSED
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _dispatch(self, batch: list):
+        items = [item for item, _, _ in batch]
+
+        try:
+            preds = await self.score_fn(items)
+        except Exception as e:
+            if len(batch) > 1 and not isinstance(e, PoolSaturated):
+                # ONE BAD RECORD MUST NOT FAIL THE UNRELATED REQUESTS IT WAS BATCHED WITH,
+                # SO SCORE EACH ONE ON ITS OWN AND ONLY FAIL THE ONES THAT STILL RAISE
+                self.metrics.split_batches += 1
+                await self._dispatch_one_by_one(batch)
+                return
+
+            # A FULL POOL FAILS THE WHOLE BATCH, SPLITTING IT WOULD ONLY ADD MORE JOBS
+            self._fail(batch, e)
+            return
+
+        # HAND EACH WAITING REQUEST ITS OWN RESULT
+        for (_, future, _), pred in zip(batch, preds):
+            if not future.done():
+                future.set_result(float(pred))
+
+    async def _dispatch_one_by_one(self, batch: list):
+        # AWAIT THE ROWS IN TURN SO THE RETRY NEVER HOLDS MORE THAN ONE POOL SLOT
+        for position, (item, future, _) in enumerate(batch):
+            try:
+                pred = await self.score_fn([item])
+            except PoolSaturated as e:
+                self._fail(batch[position:], e)
+                return
+            except Exception as e:
+                self._fail([batch[position]], e)
+                continue
+
+            if not future.done():
+                future.set_result(float(pred[0]))
+
+    @staticmethod
+    def _fail(batch: list, error: Exception):
+        for _, future, _ in batch:
+            if not future.done():
+                future.set_exception(error)
+
+    async def run(self):
+        """
+        This function is responsible for forming batches and handing them off for scoring
+        until it is cancelled. The next batch starts forming while earlier ones are scored.
+        """
+        while True:
+            batch = await self._collect()
+
+            started = time.perf_counter()
+            self.metrics.record_batch(
+                len(batch), [(started - enqueued) * 1000 for _, _, enqueued in batch]
+            )
+
+            # KEEP A REFERENCE SO THE TASK IS NOT GARBAGE COLLECTED MID-FLIGHT
+            task = asyncio.create_task(self._dispatch(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
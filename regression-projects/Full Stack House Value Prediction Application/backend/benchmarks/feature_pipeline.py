@@ -0,0 +1,109 @@
+"""
+Checks that the precompiled FeaturePipeline produces exactly the same model inputs and
+predictions as the pandas/scikit-learn path, then times both for single-row predictions.
+
+Run from the directory that contains the backend package (e.g. / inside the container):
+
+    python -m app.benchmarks.feature_pipeline --artifacts /app --rows 5000
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from app.artifacts import ArtifactRegistry
+from app.inference import build_features, predict_fast, predict_values, to_frame
+from app.model.house_model import House
+
+
+def sample_houses(artifacts, n_rows: int, seed: int = 42) -> list:
+    """
+    This function is responsible for generating houses inside the range the scaler was fitted on.
+
+    Parameters:
+        - artifacts: Loaded Artifacts
+        - n_rows: Number of houses to generate
+        - seed: Random seed
+
+    Returns:
+        - List of House records, including some with an unseen ocean_proximity
+    """
+    rng = np.random.default_rng(seed)
+    low, high = artifacts.scaler.data_min_, artifacts.scaler.data_max_
+    categories = list(artifacts.encoder.categories_[0]) + ["Near Bay"]
+
+    houses = []
+    for _ in range(n_rows):
+        values = rng.uniform(low, high)
+        record = dict(zip(House.model_fields, values))
+        for name in ("total_rooms", "total_bedrooms", "population", "households"):
+            record[name] = int(record[name])
+        record["ocean_proximity"] = categories[rng.integers(len(categories))]
+        houses.append(House(**record))
+    return houses
+
+
+def check_parity(artifacts, houses: list) -> bool:
+    """
+    This function is responsible for comparing the fast path against the sklearn path bit for bit.
+
+    Parameters:
+        - artifacts: Loaded Artifacts
+        - houses: List of House records
+
+    Returns:
+        - True if every feature row and prediction is identical
+    """
+    X_pred = to_frame(houses)
+    X_pred["ocean_proximity"] = artifacts.encoder.transform(X_pred[["ocean_proximity"]])
+    expected = artifacts.scaler.transform(X_pred).astype(np.float32)
+
+    batch_ok = np.array_equal(build_features(artifacts.features, houses), expected)
+    rows_ok = all(
+        np.array_equal(build_features(artifacts.features, [house])[0], row)
+        for house, row in zip(houses, expected)
+    )
+    preds_ok = np.array_equal(predict_fast(artifacts, houses), predict_values(artifacts, to_frame(houses)))
+
+    print(f"Batch features identical:  {batch_ok}")
+    print(f"Single rows identical:     {rows_ok}")
+    print(f"Predictions identical:     {preds_ok}")
+    return batch_ok and rows_ok and preds_ok
+
+
+def time_single_row(artifacts, houses: list) -> None:
+    """
+    This function is responsible for timing one-house predictions on both paths.
+
+    Parameters:
+        - artifacts: Loaded Artifacts
+        - houses: List of House records
+    """
+    start_time = time.perf_counter()
+    for house in houses:
+        predict_values(artifacts, to_frame([house]))
+    sklearn_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    for house in houses:
+        predict_fast(artifacts, [house])
+    fast_time = time.perf_counter() - start_time
+
+    print(f"sklearn path: {round(sklearn_time / len(houses) * 1e6, 1)} us/row")
+    print(f"fast path:    {round(fast_time / len(houses) * 1e6, 1)} us/row")
+    print(f"Speedup:      {round(sklearn_time / fast_time, 2)}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--artifacts", default=".", help="Directory holding model.pkl, scaler.pkl and encoder.pkl")
+    parser.add_argument("--rows", type=int, default=2000)
+    args = parser.parse_args()
+
+    artifacts = ArtifactRegistry(directory=args.artifacts).load()
+    houses = sample_houses(artifacts, args.rows)
+
+    if not check_parity(artifacts, houses):
+        sys.exit(1)
+    time_single_row(artifacts, houses)
@@ -0,0 +1,297 @@
+"""
+Drives the prediction API with houses sampled from the housing CSV and reports throughput,
+p50/p95/p99 latency and error rate. Results are saved as JSON so runs can be compared across
+code changes.
+
+Three ways to reach the API:
+    --url URL       an already running server, e.g. the docker compose stack (default)
+    --serve         start uvicorn locally for the duration of the run (--workers N for several processes)
+    --in-process    call the ASGI app directly, no sockets. Client and server share one process,
+                    so numbers are lower than against a real server
+
+Run from the directory that contains the backend package (e.g. / inside the container):
+
+    python -m app.benchmarks.load_test --serve --mode single --concurrency 32 --requests 5000
+    python -m app.benchmarks.load_test --url http://localhost:8000 --mode batch --batch-size 1000
+
+By default the harness cycles through 1000 bodies, so in single mode most requests are answered
+from the prediction cache. Pass --unique to send a different house with every request and measure
+the model path instead:
+
+    python -m app.benchmarks.load_test --serve --mode single --unique
+
+Houses are sampled from data/housing.csv of the repository checkout this file lives in. The backend
+image does not contain the data, so inside the container copy it in and pass its path with --data:
+
+    docker compose cp data/housing.csv backend:/tmp/housing.csv
+    docker compose exec -w / backend python -m app.benchmarks.load_test --data /tmp/housing.csv
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import math
+import os
+import pathlib
+import platform
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import httpx
+import numpy as np
+import pandas as pd
+
+from app.config import CPU_COUNT
+from app.model.house_model import House
+
+ENDPOINTS = {"single": "/predict/", "batch": "/predict/batch"}
+
+# <repo>/backend/benchmarks/load_test.py -> <repo>/data/housing.csv
+DEFAULT_DATA = pathlib.Path(__file__).resolve().parents[2] / "data" / "housing.csv"
+
+
+def load_payloads(
+    filepath: str, mode: str, batch_size: int, n_payloads: int = 1000, seed: int = 42, unique: bool = False
+) -> list:
+    """
+    This function is responsible for building request bodies from real rows of the housing data.
+
+    Parameters:
+        - filepath: Path to housing.csv
+        - mode: "single" for one house per request, "batch" for batch_size houses per request
+        - batch_size: Houses per request in batch mode
+        - n_payloads: Distinct bodies to cycle through
+        - seed: Random seed for the sampling
+        - unique: Make every house different, so none of them can be answered from the prediction cache
+
+    Returns:
+        - List of JSON-encoded request bodies
+    """
+    df = pd.read_csv(filepath).dropna()[list(House.model_fields)]
+    for name, field in House.model_fields.items():
+        if field.annotation is int:
+            df[name] = df[name].astype(int)
+    records = df.to_dict(orient="records")
+
+    rng = np.random.default_rng(seed)
+    rows_per_payload = 1 if mode == "single" else batch_size
+    payloads = []
+    n_houses = 0
+    for _ in range(n_payloads if mode == "single" else max(1, n_payloads // rows_per_payload)):
+        houses = [records[i] for i in rng.integers(len(records), size=rows_per_payload)]
+        if unique:
+            # THE CACHE KEY IS THE EXACT FIELD VALUES. A NUDGE OF A FEW float64 ULPS MAKES EVERY HOUSE
+            # A MISS AND IS FAR BELOW THE float32 PRECISION THE MODEL WORKS IN
+            houses = [
+                {**house, "median_income": house["median_income"] + (n_houses + i + 1) * math.ulp(house["median_income"])}
+                for i, house in enumerate(houses)
+            ]
+            n_houses += len(houses)
+        body = houses[0] if mode == "single" else houses
+        payloads.append(json.dumps(body).encode("utf-8"))
+    return payloads
+
+
+def summarize(latencies: list, statuses: dict, errors: int, elapsed: float, rows_per_request: int) -> dict:
+    """
+    This function is responsible for turning the raw measurements into the reported numbers.
+
+    Parameters:
+        - latencies: Latency of every request in seconds
+        - statuses: Count of each status code, or of the exception name for failed requests
+        - errors: Requests that failed or did not return 2xx
+        - elapsed: Wall time of the measured run in seconds
+        - rows_per_request: Houses scored by each request
+
+    Returns:
+        - Dictionary of results
+    """
+    latencies_ms = np.asarray(latencies) * 1000
+    completed = len(latencies)
+    return {
+        "requests": completed,
+        "errors": errors,
+        "error_rate": round(errors / completed, 4) if completed else 0,
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(completed / elapsed, 2) if elapsed else 0,
+        "rows_per_second": round(completed * rows_per_request / elapsed, 2) if elapsed else 0,
+        "latency_ms": {
+            "mean": round(float(latencies_ms.mean()), 3) if completed else None,
+            "p50": round(float(np.percentile(latencies_ms, 50)), 3) if completed else None,
+            "p95": round(float(np.percentile(latencies_ms, 95)), 3) if completed else None,
+            "p99": round(float(np.percentile(latencies_ms, 99)), 3) if completed else None,
+            "max": round(float(latencies_ms.max()), 3) if completed else None,
+        },
+        "status_counts": statuses,
+    }
+
+
+async def run_load(
+    client: httpx.AsyncClient, path: str, payloads: list, concurrency: int, n_requests: int, duration: float, offset: int = 0
+) -> tuple:
+    """
+    This function is responsible for keeping concurrency requests in flight until the request
+    count or the duration is reached, whichever comes first. Bodies are taken in order from offset.
+
+    Returns:
+        - latencies, statuses, errors, elapsed
+    """
+    latencies, statuses = [], {}
+    errors = 0
+    issued = 0
+    headers = {"content-type": "application/json"}
+    start_time = time.perf_counter()
+    deadline = start_time + duration if duration else None
+
+    async def worker():
+        nonlocal issued, errors
+        while issued < n_requests and (deadline is None or time.perf_counter() < deadline):
+            body = payloads[(offset + issued) % len(payloads)]
+            issued += 1
+
+            sent = time.perf_counter()
+            try:
+                response = await client.post(path, content=body, headers=headers)
+                key = str(response.status_code)
+                failed = not response.is_success
+            except httpx.HTTPError as e:
+                key = type(e).__name__
+                failed = True
+            latencies.append(time.perf_counter() - sent)
+            statuses[key] = statuses.get(key, 0) + 1
+            errors += failed
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, statuses, errors, time.perf_counter() - start_time
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextlib.contextmanager
+def uvicorn_server(workers: int, timeout: float = 60):
+    """
+    This function is responsible for running the API under uvicorn until the block exits.
+
+    Parameters:
+        - workers: Number of uvicorn worker processes
+        - timeout: Seconds to wait for the model to load
+
+    Returns:
+        - Base URL of the server
+    """
+    port = free_port()
+
+    # THE SAME WORKER COUNT THE CONTAINER EXPORTS, SO EACH WORKER SIZES ITS THREADS TO ITS SHARE OF THE CORES
+    env = {**os.environ, "WEB_CONCURRENCY": str(workers)}
+    process = subprocess.Popen([
+        sys.executable, "-m", "uvicorn", "app.main:api",
+        "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers), "--log-level", "warning",
+    ], env=env)
+    url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with code {process.returncode}")
+            try:
+                if httpx.get(url + "/", timeout=1).json().get("status") == "Healthy":
+                    break
+            except httpx.HTTPError:
+                pass
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Server did not become healthy within {timeout}s")
+            time.sleep(0.2)
+        yield url
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+async def benchmark(args, payloads: list) -> tuple:
+    """
+    This function is responsible for warming up the target and then measuring it.
+
+    Returns:
+        - latencies, statuses, errors, elapsed
+    """
+    path = ENDPOINTS[args.mode]
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    async def measure(client):
+        # WARM UP CONNECTIONS, THREAD POOLS AND CACHES BEFORE MEASURING
+        await run_load(client, path, payloads, min(args.concurrency, args.warmup or 1), args.warmup, 0)
+        # START AFTER THE WARM-UP BODIES, SO WITH --unique NONE OF THEM IS ALREADY CACHED
+        return await run_load(client, path, payloads, args.concurrency, args.requests, args.duration, offset=args.warmup)
+
+    if args.in_process:
+        from app.main import api
+
+        transport = httpx.ASGITransport(app=api)
+        async with api.router.lifespan_context(api):
+            async with httpx.AsyncClient(transport=transport, base_url="http://app", timeout=args.timeout) as client:
+                return await measure(client)
+
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=args.timeout) as client:
+        return await measure(client)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="Server to drive when neither --serve nor --in-process is given")
+    parser.add_argument("--serve", action="store_true", help="Start uvicorn locally for the run")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes with --serve")
+    parser.add_argument("--in-process", action="store_true", help="Call the ASGI app directly")
+    parser.add_argument("--mode", choices=ENDPOINTS, default="single")
+    parser.add_argument("--batch-size", type=int, default=100, help="Houses per request in batch mode")
+    parser.add_argument("--concurrency", type=int, default=16, help="Requests kept in flight")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests to send after warm-up")
+    parser.add_argument("--duration", type=float, default=0, help="Stop after this many seconds, 0 for no limit")
+    parser.add_argument("--warmup", type=int, default=50, help="Requests sent before measuring")
+    parser.add_argument("--timeout", type=float, default=30, help="Per-request timeout in seconds")
+    parser.add_argument("--data", default=str(DEFAULT_DATA), help="Housing CSV to sample houses from")
+    parser.add_argument("--unique", action="store_true", help="Send a different house with every request, so the prediction cache never hits")
+    parser.add_argument("--output", default=None, help="Where to save the JSON results")
+    args = parser.parse_args()
+    if not pathlib.Path(args.data).exists():
+        parser.error(f"{args.data} not found, pass the housing CSV with --data")
+
+    # ONE BODY PER REQUEST WHEN THEY MUST ALL DIFFER, OTHERWISE A FIXED POOL TO CYCLE THROUGH
+    n_payloads = 1000
+    if args.unique:
+        n_payloads = (args.requests + args.warmup) * (args.batch_size if args.mode == "batch" else 1)
+    payloads = load_payloads(args.data, args.mode, args.batch_size, n_payloads=n_payloads, unique=args.unique)
+    started_at = datetime.now()
+
+    with (uvicorn_server(args.workers) if args.serve else contextlib.nullcontext(args.url)) as url:
+        args.url = url
+        latencies, statuses, errors, elapsed = asyncio.run(benchmark(args, payloads))
+
+    results = {
+        "started_at": started_at.isoformat(),
+        "target": "in-process" if args.in_process else args.url,
+        "config": {
+            "mode": args.mode,
+            "batch_size": args.batch_size if args.mode == "batch" else 1,
+            "concurrency": args.concurrency,
+            "unique_payloads": args.unique,
+            "workers": args.workers if args.serve else None,
+            "cpu_count": CPU_COUNT,
+            "python": platform.python_version(),
+        },
+        **summarize(latencies, statuses, errors, elapsed, args.batch_size if args.mode == "batch" else 1),
+    }
+
+    print(f"{results['requests']} requests in {results['duration_s']}s, {results['errors']} errors ({results['error_rate']:.2%})")
+    print(f"Throughput: {results['throughput_rps']} req/s, {results['rows_per_second']} rows/s")
+    print("Latency (ms): " + ", ".join(f"{name} {value}" for name, value in results["latency_ms"].items()))
+
+    output = pathlib.Path(args.output or f"load-test-{args.mode}-{started_at.strftime('%Y%m%d-%H%M%S')}.json")
+    output.write_text(json.dumps(results, indent=2))
+    print(f"Results saved to {output}")
@@ -0,0 +1,76 @@
+"""
+Compares the old response path (jsonable_encoder, then JSONResponse with the stdlib json module)
+against FastJSONResponse for prediction responses of 1 and 10k rows, after checking that both
+produce the same JSON.
+
+Run from the directory that contains the backend package (e.g. / inside the container):
+
+    python -m app.benchmarks.serialization --rows 1,10000
+"""
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.responses import FastJSONResponse
+
+
+def old_response(preds: np.ndarray) -> bytes:
+    json_data = jsonable_encoder({
+        "message": "Success",
+        "house_values": np.round(preds.astype(float), 2).tolist()
+    })
+    return JSONResponse(content=json_data).body
+
+
+def new_response(preds: np.ndarray) -> bytes:
+    return FastJSONResponse(content={
+        "message": "Success",
+        "house_values": np.round(preds.astype(np.float64), 2)
+    }).body
+
+
+def time_per_call(fn, preds: np.ndarray, min_seconds: float = 1.0) -> float:
+    """
+    This function is responsible for measuring the average time of one response.
+
+    Parameters:
+        - fn: Function that builds a response body from the predictions
+        - preds: Predictions to serialize
+        - min_seconds: Keep calling until at least this much time has passed
+
+    Returns:
+        - Seconds per call
+    """
+    fn(preds)  # WARM UP
+    calls = 0
+    start_time = time.perf_counter()
+    while (elapsed := time.perf_counter() - start_time) < min_seconds:
+        fn(preds)
+        calls += 1
+    return elapsed / calls
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", default="1,10000", help="Comma separated response sizes")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+
+    print(f"{'rows':>8} {'old us':>12} {'new us':>12} {'speedup':>9}")
+    for n_rows in (int(rows) for rows in args.rows.split(",")):
+        # SAME DTYPE AND RANGE THE MODEL PRODUCES
+        preds = rng.uniform(15000, 500000, size=n_rows).astype(np.float32)
+
+        if json.loads(old_response(preds)) != json.loads(new_response(preds)):
+            print(f"Responses differ for {n_rows} rows")
+            sys.exit(1)
+
+        old = time_per_call(old_response, preds)
+        new = time_per_call(new_response, preds)
+        print(f"{n_rows:>8} {old * 1e6:>12,.1f} {new * 1e6:>12,.1f} {old / new:>8.1f}x")
@@ -0,0 +1,70 @@
+"""
+Compares the NumPy tree evaluator against XGBRegressor.predict on the same model, reporting
+the largest prediction difference and rows/sec for several batch sizes. Needs xgboost installed.
+
+Run from the directory that contains the backend package (e.g. / inside the container):
+
+    python -m app.benchmarks.tree_model --artifacts /app
+"""
+import argparse
+import pathlib
+import time
+
+import joblib
+import numpy as np
+
+from app.tree_model import TreeEnsemble
+
+
+def rows_per_second(predict, X: np.ndarray, min_seconds: float = 1.0) -> float:
+    """
+    This function is responsible for measuring how many rows per second a predict function scores.
+
+    Parameters:
+        - predict: Function that takes a 2D array
+        - X: Rows to score on every call
+        - min_seconds: Keep calling until at least this much time has passed
+
+    Returns:
+        - Rows scored per second
+    """
+    predict(X)  # WARM UP
+    calls = 0
+    start_time = time.perf_counter()
+    while (elapsed := time.perf_counter() - start_time) < min_seconds:
+        predict(X)
+        calls += 1
+    return calls * len(X) / elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--artifacts", default=".", help="Directory holding model.pkl and model.trees")
+    parser.add_argument("--batch-sizes", default="1,100,10000")
+    args = parser.parse_args()
+
+    directory = pathlib.Path(args.artifacts)
+
+    start_time = time.perf_counter()
+    xgb_model = joblib.load(directory / "model.pkl")
+    print(f"model.pkl load:   {round((time.perf_counter() - start_time) * 1000, 2)} ms")
+
+    start_time = time.perf_counter()
+    trees = TreeEnsemble.load(directory / "model.trees")
+    print(f"model.trees load: {round((time.perf_counter() - start_time) * 1000, 2)} ms\n")
+
+    # SCALED FEATURES LIVE IN [0, 1]; SPRINKLE IN MISSING VALUES TO EXERCISE DEFAULT BRANCHES
+    rng = np.random.default_rng(42)
+    X = rng.uniform(0, 1, size=(10000, trees.n_features)).astype(np.float32)
+    X[rng.uniform(size=X.shape) < 0.01] = np.nan
+
+    diff = np.abs(trees.predict(X) - xgb_model.predict(X))
+    print(f"Max abs difference:  {diff.max():.6f}")
+    print(f"Max rel difference:  {(diff / np.abs(xgb_model.predict(X))).max():.2e}\n")
+
+    print(f"{'batch':>8} {'xgboost rows/s':>16} {'numpy rows/s':>16}")
+    for batch_size in (int(size) for size in args.batch_sizes.split(",")):
+        batch = X[:batch_size]
+        xgb_rate = rows_per_second(xgb_model.predict, batch)
+        numpy_rate = rows_per_second(trees.predict, batch)
+        print(f"{batch_size:>8} {xgb_rate:>16,.0f} {numpy_rate:>16,.0f}")
@@ -0,0 +1,123 @@
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+
+from app.features import FEATURE_COLUMNS
+from app.model.house_model import House
+
+
+def house_key(house: House) -> Tuple:
+    """
+    This function is responsible for building the cache key of a house. Pydantic has already
+    coerced every field to its declared type, so 880 and 880.0 give the same key.
+
+    Parameters:
+        - house: Validated House
+
+    Returns:
+        - Tuple of the field values in feature order
+    """
+    values = house.__dict__
+    return tuple(values[name] for name in FEATURE_COLUMNS)
+
+
+class PredictionCache:
+    """
+    This class is responsible for remembering recent predictions, least recently used first out.
+    Entries belong to the model version that produced them: the first lookup made with a new
+    version drops everything cached for the old one. It is only touched from the event loop,
+    so it needs no lock.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: float = 0):
+        self.max_size = max_size
+        self.ttl = ttl_seconds
+        self.version: Optional[str] = None
+        self._entries: "OrderedDict[Hashable, Tuple[float, float]]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def _check_version(self, version: str):
+        if version != self.version:
+            if self._entries:
+                self.invalidations += 1
+                self._entries.clear()
+            self.version = version
+
+    def get(self, version: str, key: Hashable) -> Optional[float]:
+        """
+        This function is responsible for looking up a cached prediction.
+
+        Parameters:
+            - version: Version of the artifacts currently served
+            - key: Output of house_key
+
+        Returns:
+            - The cached prediction, or None on a miss
+        """
+        self._check_version(version)
+
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        value, expires_at = entry
+        if self.ttl and expires_at < time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, version: str, key: Hashable, value: float):
+        """
+        This function is responsible for storing a prediction.
+
+        Parameters:
+            - version: Version of the artifacts the prediction was requested under
+            - key: Output of house_key
+            - value: The prediction
+        """
+        # THE MODEL WAS SWAPPED WHILE THIS PREDICTION WAS IN FLIGHT, SO DO NOT KEEP IT
+        if not self.enabled or version != self.version:
+            return
+
+        self._entries[key] = (value, time.monotonic() + self.ttl if self.ttl else 0.0)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def snapshot(self) -> dict:
+        """
+        This function is responsible for returning the cache counters as plain Python types.
+
+        Returns:
+            - Dictionary with the size and hit/miss/eviction counters
+        """
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "model_version": self.version,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,39 @@
+import os
+
+# CORES THIS PROCESS MAY RUN ON, WHICH RESPECTS CPU PINNING (e.g. docker --cpuset-cpus)
+CPU_COUNT = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+
+# NUMBER OF SERVER PROCESSES. UVICORN READS THIS ITSELF AS ITS --workers DEFAULT,
+# HERE IT IS USED TO SPLIT THE CORES BETWEEN THE PROCESSES INSTEAD OF OVERSUBSCRIBING THEM
+WEB_CONCURRENCY = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+CORES_PER_WORKER = max(1, CPU_COUNT // WEB_CONCURRENCY)
+
+# DIRECTORY THAT HOLDS THE MODEL, SCALER AND ENCODER
+ARTIFACT_DIR = os.getenv("ARTIFACT_DIR", ".")
+
+# model.pkl SERVES THE PICKLED XGBRegressor, model.trees SERVES THE EXPORTED TREES WITH NUMPY ONLY
+MODEL_FILE = os.getenv("MODEL_FILE", "model.pkl")
+
+# SCALER AND ENCODER PARAMETERS AS JSON, READ INSTEAD OF THE PICKLES WHEN SERVING model.trees
+PREPROCESSING_FILE = os.getenv("PREPROCESSING_FILE", "preprocessing.json")
+
+# HOW OFTEN (IN SECONDS) TO CHECK FOR NEW ARTIFACTS
+ARTIFACT_POLL_SECONDS = float(os.getenv("ARTIFACT_POLL_SECONDS", "5"))
+
+# MAXIMUM NUMBER OF HOUSES ACCEPTED BY /predict/batch
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "10000"))
+
+# MICRO-BATCHING OF CONCURRENT /predict/ REQUESTS
+MICROBATCH_MAX_ROWS = int(os.getenv("MICROBATCH_MAX_ROWS", "64"))
+MICROBATCH_MAX_WAIT_MS = float(os.getenv("MICROBATCH_MAX_WAIT_MS", "2"))
+
+# CACHE OF RECENT /predict/ RESULTS. A SIZE OF 0 TURNS IT OFF, A TTL OF 0 KEEPS ENTRIES UNTIL EVICTED
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "10000"))
+PREDICTION_CACHE_TTL_SECONDS = float(os.getenv("PREDICTION_CACHE_TTL_SECONDS", "3600"))
+
+# THREAD POOL THAT RUNS INFERENCE OFF THE EVENT LOOP
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", str(CORES_PER_WORKER)))
+INFERENCE_MAX_PENDING = int(os.getenv("INFERENCE_MAX_PENDING", str(INFERENCE_WORKERS * 4)))
+
+# THREADS XGBOOST USES FOR ONE predict() CALL
+MODEL_THREADS = int(os.getenv("MODEL_THREADS", str(CORES_PER_WORKER)))
@@ -0,0 +1,11 @@
+#!/bin/sh
+# ONE UVICORN WORKER PER CORE AVAILABLE TO THE CONTAINER (nproc RESPECTS --cpuset-cpus), AND AT LEAST
+# TWO SO A SIGHUP ROLLING RESTART ALWAYS LEAVES ONE SERVING. WEB_CONCURRENCY (e.g. IN .env) OVERRIDES
+# IT. UVICORN READS IT AS ITS --workers DEFAULT AND app.config SPLITS THE CORES BETWEEN THE WORKERS
+if [ -z "$WEB_CONCURRENCY" ]; then
+    WEB_CONCURRENCY=$(nproc)
+    [ "$WEB_CONCURRENCY" -lt 2 ] && WEB_CONCURRENCY=2
+fi
+export WEB_CONCURRENCY
+
+exec "$@"
@@ -0,0 +1,55 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+
+class PoolSaturated(RuntimeError):
+    """
+    Raised when the inference pool already has as many jobs as it is allowed to hold.
+    """
+
+
+class InferencePool:
+    """
+    This class is responsible for running blocking inference work on a bounded thread pool,
+    so the event loop stays free to serve other connections. Once max_pending jobs are
+    queued or running, new jobs are rejected straight away instead of piling up.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="inference")
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    @property
+    def saturated(self) -> bool:
+        return self._pending >= self.max_pending
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """
+        This function is responsible for running fn(*args) on the pool and awaiting its result.
+
+        Parameters:
+            - fn: Blocking function to call
+            - args: Positional arguments for fn
+
+        Returns:
+            - Whatever fn returns
+        """
+        # ONLY TOUCHED FROM THE EVENT LOOP THREAD, SO NO LOCK IS NEEDED
+        if self.saturated:
+            raise PoolSaturated(f"Inference pool is full ({self.max_pending} jobs pending)")
+
+        self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self._pending -= 1
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,234 @@
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.model.house_model import House
+
+# FEATURE ORDER THE SCALER AND MODEL WERE FITTED ON
+FEATURE_COLUMNS = list(House.model_fields)
+
+CATEGORICAL_COLUMN = "ocean_proximity"
+
+
+class FeaturePipeline:
+    """
+    This class is responsible for turning raw house records into model-ready rows without
+    going through pandas or scikit-learn. It holds the fitted encoder categories and the
+    scaler's min_/scale_, then every call is a dict lookup plus a multiply-add on NumPy
+    arrays. The arithmetic matches MinMaxScaler.transform step for step, so the rows are
+    bit-for-bit identical to the sklearn path.
+    """
+
+    def __init__(
+        self,
+        categories: Sequence[str],
+        unknown_value: Optional[float],
+        scale: Sequence[float],
+        offset: Sequence[float],
+        clip: bool = False,
+        feature_range: Sequence[float] = (0, 1),
+        feature_names: Optional[Sequence[str]] = None,
+    ):
+        if feature_names is not None and list(feature_names) != FEATURE_COLUMNS:
+            raise ValueError(f"Scaler was fitted on {list(feature_names)}, expected {FEATURE_COLUMNS}")
+
+        # CATEGORY -> ORDINAL CODE, WITH THE ENCODER'S FALLBACK FOR UNSEEN VALUES
+        self.codes = {category: float(code) for code, category in enumerate(categories)}
+        self.unknown_value = float(unknown_value) if unknown_value is not None else None
+
+        self.scale_factors = np.asarray(scale, dtype=np.float64)
+        self.offset = np.asarray(offset, dtype=np.float64)
+        self.clip = clip
+        self.feature_range = tuple(feature_range)
+
+        self.numeric_columns = [
+            (i, name) for i, name in enumerate(FEATURE_COLUMNS) if name != CATEGORICAL_COLUMN
+        ]
+        self.category_index = FEATURE_COLUMNS.index(CATEGORICAL_COLUMN)
+        self._local = threading.local()
+
+    @classmethod
+    def from_fitted(cls, encoder, scaler) -> "FeaturePipeline":
+        """
+        This function is responsible for compiling the pipeline from the pickled OrdinalEncoder and MinMaxScaler.
+
+        Parameters:
+            - encoder: Fitted OrdinalEncoder for ocean_proximity
+            - scaler: Fitted MinMaxScaler
+
+        Returns:
+            - FeaturePipeline
+        """
+        names = getattr(scaler, "feature_names_in_", None)
+        return cls(
+            categories=encoder.categories_[0],
+            unknown_value=encoder.unknown_value if encoder.handle_unknown == "use_encoded_value" else None,
+            scale=scaler.scale_,
+            offset=scaler.min_,
+            clip=getattr(scaler, "clip", False),
+            feature_range=scaler.feature_range,
+            feature_names=list(names) if names is not None else None,
+        )
+
+    @classmethod
+    def from_params(cls, params: Dict[str, Any]) -> "FeaturePipeline":
+        """
+        This function is responsible for compiling the pipeline from the preprocessing.json written
+        by training/export_model.py, so serving needs neither scikit-learn nor joblib.
+
+        Parameters:
+            - params: Parsed preprocessing.json
+
+        Returns:
+            - FeaturePipeline
+        """
+        return cls(
+            categories=params["categories"],
+            unknown_value=params["unknown_value"],
+            scale=params["scale"],
+            offset=params["min"],
+            clip=params["clip"],
+            feature_range=params["feature_range"],
+            feature_names=params["feature_names"],
+        )
+
+    def _code(self, value: Any) -> float:
+        try:
+            code = self.codes.get(value)
+        except TypeError:
+            # UNHASHABLE VALUES CANNOT BE A CATEGORY, TREAT THEM LIKE ANY OTHER UNSEEN VALUE
+            code = None
+        if code is not None:
+            return code
+        if self.unknown_value is None:
+            raise ValueError(f"Found unknown category {value!r} in column {CATEGORICAL_COLUMN}")
+        return self.unknown_value
+
+    def _buffers(self):
+        # ONE PREALLOCATED ROW PER INFERENCE THREAD
+        local = self._local
+        if not hasattr(local, "raw"):
+            local.raw = np.empty(len(FEATURE_COLUMNS), dtype=np.float64)
+            local.row = np.empty((1, len(FEATURE_COLUMNS)), dtype=np.float32)
+        return local.raw, local.row
+
+    def scale(self, raw: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        This function is responsible for min-max scaling encoded rows in place and casting them to float32.
+
+        Parameters:
+            - raw: float64 rows from one of the encode functions, overwritten in place
+            - out: float32 array to write into, allocated when not given
+
+        Returns:
+            - float32 array with the scaled rows
+        """
+        # SAME OPERATIONS AND PRECISION AS MinMaxScaler.transform: X * scale_ + min_
+        np.multiply(raw, self.scale_factors, out=raw)
+        np.add(raw, self.offset, out=raw)
+        if self.clip:
+            np.clip(raw, self.feature_range[0], self.feature_range[1], out=raw)
+        if out is None:
+            out = np.empty(raw.shape, dtype=np.float32)
+        out[...] = raw
+        return out
+
+    def encode_one(self, record: Dict[str, Any]) -> np.ndarray:
+        """
+        This function is responsible for turning a single house into an unscaled float64 row.
+        The returned row is reused by the next call on the same thread.
+
+        Parameters:
+            - record: House.model_dump() output
+
+        Returns:
+            - float64 array of shape (n_features,)
+        """
+        raw, _ = self._buffers()
+        for i, name in self.numeric_columns:
+            raw[i] = record[name]
+        raw[self.category_index] = self._code(record[CATEGORICAL_COLUMN])
+        return raw
+
+    def encode_records(self, records: Sequence[Dict[str, Any]]) -> np.ndarray:
+        """
+        This function is responsible for turning many houses into unscaled float64 rows.
+
+        Parameters:
+            - records: List of House.model_dump() outputs
+
+        Returns:
+            - float64 array of shape (n_houses, n_features)
+        """
+        raw = np.empty((len(records), len(FEATURE_COLUMNS)), dtype=np.float64)
+        for i, record in enumerate(records):
+            for j, name in self.numeric_columns:
+                raw[i, j] = record[name]
+            raw[i, self.category_index] = self._code(record[CATEGORICAL_COLUMN])
+        return raw
+
+    def encode_columns(self, columns: Dict[str, List[Any]]) -> np.ndarray:
+        """
+        This function is responsible for turning a columnar payload into unscaled float64 rows.
+
+        Parameters:
+            - columns: Mapping of feature name to one value per house
+
+        Returns:
+            - float64 array of shape (n_houses, n_features)
+        """
+        n_rows = len(columns[CATEGORICAL_COLUMN])
+        raw = np.empty((n_rows, len(FEATURE_COLUMNS)), dtype=np.float64)
+        for j, name in self.numeric_columns:
+            raw[:, j] = columns[name]
+        raw[:, self.category_index] = [
+            self._code(value) for value in columns[CATEGORICAL_COLUMN]
+        ]
+        return raw
+
+    def row_buffer(self) -> np.ndarray:
+        """
+        This function is responsible for returning this thread's preallocated float32 output row.
+
+        Returns:
+            - float32 array of shape (1, n_features)
+        """
+        return self._buffers()[1]
+
+    def transform_one(self, record: Dict[str, Any]) -> np.ndarray:
+        """
+        This function is responsible for building the model input for a single house.
+        The returned row is reused by the next call on the same thread.
+
+        Parameters:
+            - record: House.model_dump() output
+
+        Returns:
+            - float32 array of shape (1, n_features)
+        """
+        return self.scale(self.encode_one(record), self.row_buffer())
+
+    def transform_records(self, records: Sequence[Dict[str, Any]]) -> np.ndarray:
+        """
+        This function is responsible for building the model input for many houses at once.
+
+        Parameters:
+            - records: List of House.model_dump() outputs
+
+        Returns:
+            - float32 array of shape (n_houses, n_features)
+        """
+        return self.scale(self.encode_records(records))
+
+    def transform_columns(self, columns: Dict[str, List[Any]]) -> np.ndarray:
+        """
+        This function is responsible for building the model input from a columnar payload.
+
+        Parameters:
+            - columns: Mapping of feature name to one value per house
+
+        Returns:
+            - float32 array of shape (n_houses, n_features)
+        """
+        return self.scale(self.encode_columns(columns))
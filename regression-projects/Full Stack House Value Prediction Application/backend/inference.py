@@ -0,0 +1,121 @@
+import numpy as np
+from typing import TYPE_CHECKING, List, Union
+
+from app.artifacts import Artifacts
+from app.features import FEATURE_COLUMNS, FeaturePipeline
+from app.metrics import STAGE_LATENCY
+from app.model.house_model import House, HouseColumns
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def to_columns(houses: HouseColumns) -> dict:
+    """
+    This function is responsible for filling in the columns left out of a HouseColumns payload.
+
+    Parameters:
+        - houses: HouseColumns payload
+
+    Returns:
+        - Dictionary of feature name to one value per house
+    """
+    columns = {}
+    for name in FEATURE_COLUMNS:
+        values = getattr(houses, name)
+        columns[name] = values if values is not None else [House.model_fields[name].default] * len(houses)
+    return columns
+
+
+def to_frame(houses: Union[List[House], HouseColumns]) -> "pd.DataFrame":
+    """
+    This function is responsible for turning a batch of houses into a DataFrame in feature order.
+
+    Parameters:
+        - houses: List of House records or a HouseColumns payload
+
+    Returns:
+        - DataFrame with one row per house
+    """
+    # ONLY THE SKLEARN REFERENCE PATH USES PANDAS, THE SLIM IMAGE DOES NOT INSTALL IT
+    import pandas as pd
+
+    if isinstance(houses, HouseColumns):
+        return pd.DataFrame(to_columns(houses), columns=FEATURE_COLUMNS)
+
+    return pd.DataFrame([house.model_dump() for house in houses], columns=FEATURE_COLUMNS)
+
+
+def predict_values(artifacts: Artifacts, X_pred: "pd.DataFrame") -> np.ndarray:
+    """
+    This function is responsible for encoding, scaling and scoring a whole batch in one model call
+    using the fitted scikit-learn objects. It is the reference the fast path is checked against.
+
+    Parameters:
+        - artifacts: Model, scaler and encoder to use
+        - X_pred: DataFrame in feature order
+
+    Returns:
+        - 1D array with one prediction per row, in input order
+    """
+    # ENCODE THE CATEGORICAL DATA
+    X_pred['ocean_proximity'] = artifacts.encoder.transform(
+        X_pred[['ocean_proximity']]
+    )
+
+    # PREPARE DATA FOR THE MODEL
+    X_scaled = np.ascontiguousarray(artifacts.scaler.transform(X_pred))
+
+    # GENERATE PREDICTIONS
+    return artifacts.model.predict(X_scaled)
+
+
+def build_features(pipeline: FeaturePipeline, houses: Union[List[House], HouseColumns]) -> np.ndarray:
+    """
+    This function is responsible for building the model input without pandas or scikit-learn.
+    Each stage is timed into the inference_stage_duration_seconds histogram.
+
+    Parameters:
+        - pipeline: FeaturePipeline compiled from the current encoder and scaler
+        - houses: List of House records or a HouseColumns payload
+
+    Returns:
+        - float32 array of shape (n_houses, n_features)
+    """
+    if isinstance(houses, HouseColumns):
+        with STAGE_LATENCY.time("build"):
+            columns = to_columns(houses)
+        with STAGE_LATENCY.time("encode"):
+            raw = pipeline.encode_columns(columns)
+        with STAGE_LATENCY.time("scale"):
+            return pipeline.scale(raw)
+
+    with STAGE_LATENCY.time("build"):
+        records = [house.model_dump() for house in houses]
+
+    if len(records) == 1:
+        with STAGE_LATENCY.time("encode"):
+            raw = pipeline.encode_one(records[0])
+        with STAGE_LATENCY.time("scale"):
+            return pipeline.scale(raw, pipeline.row_buffer())
+
+    with STAGE_LATENCY.time("encode"):
+        raw = pipeline.encode_records(records)
+    with STAGE_LATENCY.time("scale"):
+        return pipeline.scale(raw)
+
+
+def predict_fast(artifacts: Artifacts, houses: Union[List[House], HouseColumns]) -> np.ndarray:
+    """
+    This function is responsible for scoring houses through the precompiled feature pipeline.
+
+    Parameters:
+        - artifacts: Model and feature pipeline to use
+        - houses: List of House records or a HouseColumns payload
+
+    Returns:
+        - 1D array with one prediction per house, in input order
+    """
+    X = build_features(artifacts.features, houses)
+    with STAGE_LATENCY.time("predict"):
+        return artifacts.model.predict(X)
@@ -1,22 +1,95 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.encoders import jsonable_encoder
-from fastapi.responses import JSONResponse
-from app.model.house_model import House
-import joblib
-import pathlib
-import pandas as pd
+from fastapi.responses import JSONResponse, Response
+from app.model.house_model import House, HouseBatch, HouseColumns
+from app.artifacts import registry
+from app.batcher import MicroBatcher
+from app.cache import PredictionCache, house_key
+from app.config import (
+    MAX_BATCH_SIZE, MICROBATCH_MAX_ROWS, MICROBATCH_MAX_WAIT_MS,
+    INFERENCE_WORKERS, INFERENCE_MAX_PENDING,
+    PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL_SECONDS
+)
+from app.executor import InferencePool, PoolSaturated
+from app.inference import predict_fast
+from app.responses import FastJSONResponse
+from app.metrics import (
+    CACHE_EVENTS, CACHE_SIZE, CONTENT_TYPE, INFERENCE_PENDING, STAGE_LATENCY, WORKER, MetricsMiddleware, metrics
+)
+from typing import Union
+from contextlib import asynccontextmanager
+import asyncio
 import numpy as np
 from datetime import datetime
-import json
 
-api = FastAPI()
+def score_houses(houses: Union[HouseBatch, HouseColumns]) -> np.ndarray:
+    return predict_fast(registry.get(), houses)
+
+# RUNS THE BLOCKING PANDAS, SKLEARN AND XGBOOST WORK OFF THE EVENT LOOP
+inference_pool = InferencePool(workers=INFERENCE_WORKERS, max_pending=INFERENCE_MAX_PENDING)
+
+async def score_houses_async(houses: HouseBatch) -> np.ndarray:
+    return await inference_pool.run(score_houses, houses)
+
+# COALESCES CONCURRENT /predict/ CALLS INTO ONE MODEL CALL
+batcher = MicroBatcher(
+    score_fn=score_houses_async,
+    max_batch_size=MICROBATCH_MAX_ROWS,
+    max_wait_ms=MICROBATCH_MAX_WAIT_MS
+)
+
+# REMEMBERS RECENT /predict/ RESULTS FOR THE CURRENT MODEL VERSION
+prediction_cache = PredictionCache(max_size=PREDICTION_CACHE_SIZE, ttl_seconds=PREDICTION_CACHE_TTL_SECONDS)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # LOAD THE MODEL, SCALER AND ENCODER ONCE AT STARTUP
+    try:
+        registry.load()
+    except Exception as e:
+        print(f'Error: {e}')
+
+    # WATCH FOR NEW ARTIFACTS WRITTEN BY THE TRAINING PIPELINE
+    watcher = asyncio.create_task(registry.watch())
+
+    # START SCORING QUEUED /predict/ REQUESTS
+    batch_worker = asyncio.create_task(batcher.run())
+    try:
+        yield
+    finally:
+        watcher.cancel()
+        batch_worker.cancel()
+        inference_pool.shutdown()
+
+api = FastAPI(lifespan=lifespan)
+api.add_middleware(MetricsMiddleware)
+
+@metrics.on_collect
+def collect_pool_metrics():
+    INFERENCE_PENDING.set(inference_pool.pending)
+
+@metrics.on_collect
+def collect_cache_metrics():
+    stats = prediction_cache.snapshot()
+    for event in ("hits", "misses", "evictions", "expirations", "invalidations"):
+        CACHE_EVENTS.set(stats[event], event)
+    CACHE_SIZE.set(stats["size"])
+
+@api.exception_handler(PoolSaturated)
+async def pool_saturated_handler(request: Request, e: PoolSaturated):
+    return JSONResponse(
+        status_code=503,
+        content={"message": f"{e}", "data": None},
+        headers={"Retry-After": "1"}
+    )
 
 @api.get("/")
 def model_info():
-    if pathlib.Path('model.pkl').exists():
+    if registry.is_loaded:
         json_data = jsonable_encoder({
             "status":"Healthy",
             "version":"v1.0",
+            "model_version": registry.get().version,
             "accuracy": 74,
             "last_train_date": datetime(2026, 2, 14)
         })
@@ -30,43 +103,69 @@ def model_info():
         })
         return JSONResponse(content=json_data)
 
-@api.post("/predict/")
-async def predict_house_value(house: House):
-    try:
-        # LOAD THE MODEL TO PREDICT
-        model = joblib.load('model.pkl')
+# EACH WORKER PROCESS ANSWERS WITH ITS OWN COUNTERS, SO SAY WHICH WORKER THEY CAME FROM
+@api.get("/stats/batching")
+def batching_stats():
+    return JSONResponse(content={"worker": WORKER, **batcher.metrics.snapshot()})
 
-        # LOAD THE SCALER OBJECT
-        scaler = joblib.load('scaler.pkl')
+@api.get("/stats/cache")
+def cache_stats():
+    return JSONResponse(content={"worker": WORKER, **prediction_cache.snapshot()})
 
-        # LOAD THE ENCODER OBJECT
-        encoder = joblib.load('encoder.pkl')
+@api.get("/metrics")
+def prometheus_metrics():
+    return Response(content=metrics.render(), media_type=CONTENT_TYPE)
 
-        # GET THE INDEPENDENT VARIABLES TO USE FOR PREDICTION      
-        X_pred = pd.DataFrame(
-            data=[house.model_dump()]
-        )
-
-        # ENCODE THE CATEGORICAL DATA
-        X_pred['ocean_proximity'] = encoder.transform(
-            X_pred[['ocean_proximity']]
-        )
-
-        # PREPARE DATA FOR THE MODEL
-        X_scaled = scaler.transform(X_pred)
+@api.post("/predict/")
+async def predict_house_value(house: House):
+    # REPEATED HOUSES ARE ANSWERED FROM THE CACHE WITHOUT TOUCHING THE MODEL
+    pred = None
+    use_cache = prediction_cache.enabled and registry.is_loaded
+    if use_cache:
+        version = registry.get().version
+        key = house_key(house)
+        pred = prediction_cache.get(version, key)
 
-        # GENERATE PREDICTIONS
-        pred = model.predict(X_scaled)
+    # SHED LOAD EARLY INSTEAD OF QUEUEING WORK WE CANNOT GET TO
+    if pred is None and inference_pool.saturated:
+        raise PoolSaturated("Inference pool is full, try again shortly")
 
-        json_data = jsonable_encoder({
-            "message": "Success", 
-            "house_value": round(float(pred[0]), 2)
-        })
+    try:
+        if pred is None:
+            # QUEUE THE HOUSE AND WAIT FOR ITS PREDICTION FROM THE NEXT BATCH
+            pred = await batcher.submit(house)
+            if use_cache:
+                prediction_cache.put(version, key, pred)
 
-        return JSONResponse(content=json_data)
+        with STAGE_LATENCY.time("serialize"):
+            return FastJSONResponse(content={
+                "message": "Success",
+                "house_value": round(pred, 2)
+            })
     except Exception as e:
         print(f'Error: {e}')
         raise e
         json_data = jsonable_encoder({"message": f"{e}", "data" : None})
         return JSONResponse(content=json_data) 
 
+@api.post("/predict/batch")
+async def predict_house_values(houses: Union[HouseBatch, HouseColumns]):
+    if len(houses) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch of {len(houses)} houses exceeds the limit of {MAX_BATCH_SIZE}"
+        )
+
+    try:
+        # SCORE THE WHOLE BATCH IN ONE MODEL CALL ON THE INFERENCE POOL
+        preds = await inference_pool.run(score_houses, houses)
+
+        with STAGE_LATENCY.time("serialize"):
+            # THE ROUNDED ARRAY IS WRITTEN STRAIGHT TO BYTES, NO PYTHON LIST IN BETWEEN
+            return FastJSONResponse(content={
+                "message": "Success",
+                "house_values": np.round(preds.astype(np.float64), 2)
+            })
+    except Exception as e:
+        print(f'Error: {e}')
+        raise e
@@ -0,0 +1,243 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Sequence, Tuple
+
+# UPPER BOUNDS (IN SECONDS) OF THE LATENCY HISTOGRAMS
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# EVERY UVICORN WORKER KEEPS ITS OWN METRICS AND A SCRAPE REACHES ONE OF THEM AT RANDOM. LABELLING EVERY
+# SERIES WITH THE WORKER'S PID KEEPS EACH COUNTER MONOTONIC, SUM THEM OVER worker TO SEE THE WHOLE SERVER
+WORKER = str(os.getpid())
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'worker="{WORKER}"'] + [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}"
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    """
+    This class is responsible for counting events, one series per combination of label values.
+    """
+    kind = "counter"
+
+    def __init__(self, name: str, description: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def set(self, value: float, *labels):
+        # FOR MIRRORING TOTALS THAT ANOTHER OBJECT ALREADY KEEPS
+        with self._lock:
+            self._values[labels] = value
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        return [f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}" for labels, value in values.items()]
+
+
+class Gauge(Counter):
+    """
+    This class is responsible for tracking a value that goes up and down.
+    """
+    kind = "gauge"
+
+    def dec(self, *labels, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram: "Histogram", labels: Tuple):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+
+
+class Histogram:
+    """
+    This class is responsible for bucketing observations, one series per combination of label values.
+    Buckets are stored per bucket and only made cumulative when rendered, so observe() is one bisect
+    and a few additions under a lock.
+    """
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # LABELS -> [BUCKET COUNTS (LAST ONE IS +Inf), SUM]
+        self._series: Dict[Tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+
+    def time(self, *labels) -> _Timer:
+        """
+        This function is responsible for timing a with-block into this histogram.
+
+        Parameters:
+            - labels: Label values, in labelnames order
+
+        Returns:
+            - Context manager that observes the elapsed seconds on exit
+        """
+        return _Timer(self, labels)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            series = {labels: (list(counts), total) for labels, (counts, total) in self._series.items()}
+
+        lines = []
+        for labels, (counts, total) in series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _number(bound)
+                bucket_labels = _labels(self.labelnames, labels, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {repr(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    This class is responsible for holding every metric and rendering them in the Prometheus text format.
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def on_collect(self, fn: Callable[[], None]):
+        # CALLED BEFORE EVERY SCRAPE, FOR VALUES THAT ARE CHEAPER TO READ THAN TO KEEP UP TO DATE
+        self._collectors.append(fn)
+        return fn
+
+    def render(self) -> str:
+        """
+        This function is responsible for rendering every metric for a Prometheus scrape.
+
+        Returns:
+            - The exposition text
+        """
+        for fn in self._collectors:
+            fn()
+
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.description}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+REQUESTS = metrics.register(Counter(
+    "http_requests_total", "HTTP requests handled, by method, route and status code.", ("method", "route", "status")
+))
+REQUEST_LATENCY = metrics.register(Histogram(
+    "http_request_duration_seconds", "Time spent handling HTTP requests.", ("method", "route")
+))
+IN_FLIGHT = metrics.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being handled."
+))
+STAGE_LATENCY = metrics.register(Histogram(
+    "inference_stage_duration_seconds",
+    "Time spent in each inference stage: artifact_load, build, encode, scale, predict and serialize.",
+    ("stage",)
+))
+MODEL_INFO = metrics.register(Gauge(
+    "model_info", "Version of the artifacts being served, always 1.", ("version",)
+))
+CACHE_EVENTS = metrics.register(Counter(
+    "prediction_cache_events_total", "Prediction cache lookups and removals, by event.", ("event",)
+))
+CACHE_SIZE = metrics.register(Gauge(
+    "prediction_cache_size", "Predictions currently cached."
+))
+INFERENCE_PENDING = metrics.register(Gauge(
+    "inference_pool_pending", "Model calls queued or running on the inference pool."
+))
+
+
+class MetricsMiddleware:
+    """
+    This class is responsible for counting and timing every HTTP request. It is a plain ASGI
+    middleware rather than a BaseHTTPMiddleware, so it adds no extra task or body buffering.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            IN_FLIGHT.dec()
+
+            # LABEL BY ROUTE TEMPLATE, NOT RAW PATH, SO UNKNOWN URLS CANNOT BLOW UP THE SERIES COUNT
+            route = scope.get("route")
+            route = getattr(route, "path", "unmatched")
+            REQUESTS.inc(scope["method"], route, str(status))
+            REQUEST_LATENCY.observe(elapsed, scope["method"], route)
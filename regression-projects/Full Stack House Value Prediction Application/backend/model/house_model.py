@@ -1,4 +1,5 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
+from typing import Annotated, List, Optional
 
 class House(BaseModel):
     longitude: float
@@ -9,6 +10,36 @@ class House(BaseModel):
     population: int 
     households: int = 10
     median_income: float
-    ocean_proximity: object
-    
+    ocean_proximity: str
 
+
+# BODY OF /predict/batch IN ROW FORM, AN EMPTY LIST IS REJECTED WITH A 422
+HouseBatch = Annotated[List[House], Field(min_length=1)]
+
+
+class HouseColumns(BaseModel):
+    """
+    Columnar version of House, where every field holds one value per house.
+    Columns left out fall back to the defaults on House.
+    """
+    longitude: List[float]
+    latitude: List[float]
+    housing_median_age: List[float]
+    total_rooms: Optional[List[int]] = None
+    total_bedrooms: Optional[List[int]] = None
+    population: List[int]
+    households: Optional[List[int]] = None
+    median_income: List[float]
+    ocean_proximity: List[str]
+
+    @model_validator(mode="after")
+    def check_lengths(self):
+        lengths = {len(values) for values in self.model_dump().values() if values is not None}
+        if len(lengths) > 1:
+            raise ValueError("All columns must have the same length")
+        if not len(self):
+            raise ValueError("At least one house is required")
+        return self
+
+    def __len__(self):
+        return len(self.longitude)
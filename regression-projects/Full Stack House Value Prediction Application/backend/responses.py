@@ -0,0 +1,17 @@
+from typing import Any
+
+import orjson
+from fastapi.responses import Response
+
+
+class FastJSONResponse(Response):
+    """
+    This class is responsible for serializing responses whose content is already made of plain
+    Python types and NumPy arrays. It skips jsonable_encoder and the stdlib json module and hands
+    the content straight to orjson, which writes NumPy arrays to bytes without converting them to
+    Python lists first.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
@@ -0,0 +1,105 @@
+import json
+import pathlib
+
+import numpy as np
+
+# MUST MATCH training/export_model.py
+TREES_MAGIC = b"XGBTREES"
+
+# ROWS EVALUATED AT ONCE, BOUNDS THE (ROWS x TREES) WORKING SET
+CHUNK_ROWS = 2048
+
+
+class TreeEnsemble:
+    """
+    This class is responsible for evaluating an exported XGBoost regressor with NumPy alone.
+    The node table is memory-mapped, so loading is instant and every worker process that maps
+    the same file shares its pages.
+    """
+
+    def __init__(self, nodes: np.ndarray, header: dict):
+        self.header = header
+        self.base_score = header["base_score"]
+        self.max_depth = header["max_depth"]
+        self.n_features = header["n_features"]
+        self.roots = np.asarray(header["roots"], dtype=np.int32)
+
+        # FIELD VIEWS INTO THE MAPPED TABLE, NOTHING IS COPIED HERE
+        self.feature = nodes["feature"]
+        self.threshold = nodes["threshold"]
+        self.left = nodes["left"]
+        self.right = nodes["right"]
+        self.missing = nodes["missing"]
+        self.value = nodes["value"]
+
+    @classmethod
+    def load(cls, filepath) -> "TreeEnsemble":
+        """
+        This function is responsible for memory-mapping a file written by export_model.
+
+        Parameters:
+            - filepath: Path to the .trees file
+
+        Returns:
+            - TreeEnsemble ready to predict
+        """
+        filepath = pathlib.Path(filepath)
+        with open(filepath, "rb") as f:
+            if f.read(len(TREES_MAGIC)) != TREES_MAGIC:
+                raise ValueError(f"{filepath} is not an exported tree file")
+            header_length = int(np.frombuffer(f.read(8), dtype="<u8")[0])
+            header = json.loads(f.read(header_length))
+
+        dtype = np.dtype([tuple(field) for field in header["dtype"]])
+        nodes = np.memmap(
+            filepath,
+            dtype=dtype,
+            mode="r",
+            offset=len(TREES_MAGIC) + 8 + header_length,
+            shape=(header["n_nodes"],),
+        )
+        return cls(nodes, header)
+
+    def _predict_chunk(self, X: np.ndarray) -> np.ndarray:
+        n_rows, n_trees = X.shape[0], len(self.roots)
+
+        # ONE ENTRY PER (ROW, TREE) PAIR, EVERY ROW STARTS AT THE ROOT OF EVERY TREE
+        nodes = np.tile(self.roots, n_rows)
+        row_offset = np.repeat(np.arange(n_rows, dtype=np.int64) * X.shape[1], n_trees)
+        flat_X = X.ravel()
+
+        # LEAVES POINT AT THEMSELVES, SO max_depth STEPS LANDS EVERY ROW ON A LEAF
+        for _ in range(self.max_depth):
+            x = flat_X.take(row_offset + self.feature.take(nodes))
+            nodes = np.where(
+                x < self.threshold.take(nodes),
+                self.left.take(nodes),
+                np.where(np.isnan(x), self.missing.take(nodes), self.right.take(nodes))
+            )
+
+        # ADD THE TREES UP IN ORDER IN float32, THE SAME WAY XGBOOST DOES
+        leaves = self.value.take(nodes).reshape(n_rows, n_trees)
+        preds = np.full(n_rows, self.base_score, dtype=np.float32)
+        for tree in range(n_trees):
+            preds += leaves[:, tree]
+        return preds
+
+    def predict(self, X) -> np.ndarray:
+        """
+        This function is responsible for predicting a batch of rows.
+
+        Parameters:
+            - X: 2D array of shape (n_rows, n_features)
+
+        Returns:
+            - float32 array with one prediction per row
+        """
+        # XGBOOST COMPARES FEATURES AS float32, SO WE DO THE SAME
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Expected input of shape (n_rows, {self.n_features}), got {X.shape}")
+
+        preds = np.empty(X.shape[0], dtype=np.float32)
+        for start in range(0, X.shape[0], CHUNK_ROWS):
+            preds[start:start + CHUNK_ROWS] = self._predict_chunk(X[start:start + CHUNK_ROWS])
+        return preds
@@ -0,0 +1,143 @@
+import streamlit as st
+import httpx
+import asyncio
+import os
+import random
+import threading
+import time
+from dotenv import load_dotenv
+from typing import Awaitable, Callable, Optional
+
+load_dotenv()
+
+BACKEND_URL = os.getenv("BACKEND_URL")
+
+# TIMEOUT OF EACH HTTP CALL, AND OF A WHOLE PAGE'S WORTH OF LOOKUPS INCLUDING RETRIES
+REQUEST_TIMEOUT = 5.0
+PAGE_TIMEOUT = 15.0
+
+# RETRIES WAIT 0.25s, 0.5s, 1s ... (WITH JITTER), NEVER MORE THAN BACKOFF_MAX
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.25
+BACKOFF_MAX = 2.0
+
+# STATUS CODES WORTH RETRYING, EVERYTHING ELSE IS RETURNED TO THE CALLER
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+@st.cache_resource
+def event_loop() -> asyncio.AbstractEventLoop:
+    # ONE LOOP ON A BACKGROUND THREAD FOR THE WHOLE PROCESS. STREAMLIT RERUNS ARE SYNCHRONOUS,
+    # SO THEY HAND THEIR COROUTINES TO THIS LOOP, WHICH ALSO KEEPS THE CONNECTION POOL ALIVE
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="frontend-io", daemon=True).start()
+    return loop
+
+@st.cache_resource
+def http_client() -> httpx.AsyncClient:
+    # SHARED KEEP-ALIVE POOL. ITS CONNECTIONS ARE ONLY EVER USED ON event_loop()
+    return httpx.AsyncClient(
+        timeout=REQUEST_TIMEOUT,
+        limits=httpx.Limits(max_connections=32, max_keepalive_connections=16)
+    )
+
+def submit(coro: Awaitable):
+    """
+    This function is responsible for starting a coroutine on the background loop without waiting for it.
+
+    Parameters:
+        - coro: The coroutine to run
+
+    Returns:
+        - concurrent.futures.Future with its result
+    """
+    return asyncio.run_coroutine_threadsafe(coro, event_loop())
+
+async def with_backoff(call: Callable[[], Awaitable[httpx.Response]], max_retries: int = MAX_RETRIES) -> httpx.Response:
+    """
+    This function is responsible for retrying a request on timeouts, dropped connections and
+    retryable status codes, waiting exponentially longer between attempts.
+
+    Parameters:
+        - call: Function that sends the request
+        - max_retries: Most attempts to make
+
+    Returns:
+        - The successful response
+    """
+    for attempt in range(max_retries):
+        try:
+            response = await call()
+            if response.status_code not in RETRY_STATUS_CODES:
+                return response.raise_for_status()
+            error = httpx.HTTPStatusError(f"{response.status_code} from {response.url}", request=response.request, response=response)
+        except httpx.TransportError as e:
+            error = e
+
+        if attempt == max_retries - 1:
+            raise error
+        delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt)
+        await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+
+def show_error(e: BaseException):
+    if isinstance(e, (httpx.TimeoutException, TimeoutError)):
+        st.warning("The request timed out. Try again later.")
+    elif isinstance(e, httpx.ConnectError):
+        st.warning("Could not connect to the service. Check your internet.")
+    elif isinstance(e, httpx.HTTPStatusError):
+        st.warning(f"HTTP error: {e}")
+    else:
+        st.warning(f"An unexpected error occurred: {e}")
+
+async def model_info(client: httpx.AsyncClient):
+    response = await with_backoff(lambda: client.get(f'{BACKEND_URL}/'))
+    return response.json()
+
+async def predict(
+        client: httpx.AsyncClient,
+        latitude, longitude,
+        housing_median_age,
+        total_rooms, total_bedrooms,
+        population, households,
+        median_income, ocean_proximity
+    ):
+    payload = {
+        "latitude":float(latitude),
+        "longitude":float(longitude),
+        "housing_median_age":float(housing_median_age),
+        "total_rooms":int(total_rooms),
+        "total_bedrooms":int(total_bedrooms),
+        "population":int(population),
+        "households":int(households),
+        "median_income":float(median_income),
+        "ocean_proximity":str(ocean_proximity)
+    }
+    response = await with_backoff(
+        lambda: client.post(f"{BACKEND_URL}/predict/", json=payload, timeout=10)
+    )
+    return response.json()['house_value']
+
+def page_deadline(timeout: float = PAGE_TIMEOUT) -> float:
+    return time.monotonic() + timeout
+
+def wait(future, deadline: Optional[float] = None):
+    """
+    This function is responsible for waiting for a submitted coroutine until the page deadline,
+    showing a warning instead of raising if it fails or runs out of time.
+
+    Parameters:
+        - future: Returned by submit
+        - deadline: time.monotonic() value shared by every lookup on the page
+
+    Returns:
+        - Its result, or None if it failed
+    """
+    deadline = deadline if deadline is not None else page_deadline()
+    try:
+        return future.result(timeout=max(0.0, deadline - time.monotonic()))
+    except Exception as e:
+        future.cancel()
+        show_error(e)
+        return None
+
+def run(coro: Awaitable, timeout: float = PAGE_TIMEOUT):
+    return wait(submit(coro), page_deadline(timeout))
@@ -1,89 +1,8 @@
 import streamlit as st
-import requests
-import os
-from dotenv import load_dotenv
-import time
 from datetime import datetime
 
-from utils import get_location_coordinates, get_city_population, get_city_names
-
-load_dotenv()
-
-BACKEND_URL = os.getenv("BACKEND_URL")
-NOMINATIM_URL = os.getenv("NOMINATIM_URL")
-
-def model_info():
-    try:
-        response = requests.get(f'{BACKEND_URL}/')
-        data = response.json()
-        return data
-    except requests.exceptions.Timeout:
-        st.warning("The request timed out. Try again later.")
-        return None
-
-    except requests.exceptions.ConnectionError:
-        st.warning("Could not connect to the geocoding service. Check your internet.")
-        return None
-
-    except requests.exceptions.HTTPError as e:
-        st.warning(f"HTTP error: {e}")
-        return None
-
-    except Exception as e:
-        st.warning(f"An unexpected error occurred: {e}")
-        return None
-
-def predict(
-        latitude, longitude, 
-        housing_median_age, 
-        total_rooms, total_bedrooms, 
-        population, households, 
-        median_income, ocean_proximity,
-        max_retries=3
-    ):
-    payload = {
-        "latitude":float(latitude),
-        "longitude":float(longitude),
-        "housing_median_age":float(housing_median_age),
-        "total_rooms":int(total_rooms),
-        "total_bedrooms":int(total_bedrooms),
-        "population":int(population),
-        "households":int(households),
-        "median_income":float(median_income),
-        "ocean_proximity":str(ocean_proximity)
-    }
-    try:
-        for attempt in range(max_retries):
-            response = requests.post(
-                url=f"{BACKEND_URL}/predict/",
-                json=payload,
-                timeout=10
-            )
-
-            response.raise_for_status()
-
-            data = response.json()['house_value']
-
-            if data is not None:
-                return data
-            time.sleep(5)
-        return None 
-    
-    except requests.exceptions.Timeout:
-        st.warning("The request timed out. Try again later.")
-        return None
-
-    except requests.exceptions.ConnectionError:
-        st.warning("Could not connect to the geocoding service. Check your internet.")
-        return None
-
-    except requests.exceptions.HTTPError as e:
-        st.warning(f"HTTP error: {e}")
-        return None
-
-    except Exception as e:
-        st.warning(f"An unexpected error occurred: {e}")
-        return None
+from api_client import http_client, model_info, predict, submit, wait, run, page_deadline
+from utils import cached_coordinates, remember_coordinates, fetch_coordinates, get_city_population, get_city_names
 
 def main():
     st.set_page_config(
@@ -98,14 +17,27 @@ def main():
 
     # ADD A DIVIDER
     st.sidebar.divider()
+
+    # START THE HEALTH CHECK FIRST, IT RUNS ON THE BACKGROUND LOOP WHILE THE PAGE IS BUILT
+    client = http_client()
+    deadline = page_deadline()
+    info_request = submit(model_info(client))
     
     city_names = get_city_names()
 
     # ADD A SEARCH BAR FOR THE LOCATION
     txt_location = st.sidebar.selectbox('Search for a city..', city_names)
     
-    # GET THE COORDINATES
-    data = get_location_coordinates(txt_location)
+    # GET THE COORDINATES, ONLY GOING TO THE NETWORK FOR CITIES THAT ARE NOT CACHED
+    data = cached_coordinates(txt_location)
+    geocode_request = submit(fetch_coordinates(client, txt_location)) if data is None else None
+
+    # THE POPULATION IS A LOCAL LOOKUP, DONE WHILE THE REQUESTS ABOVE ARE IN FLIGHT
+    population = get_city_population(city_name=txt_location)
+
+    if geocode_request is not None:
+        data = wait(geocode_request, deadline)
+        remember_coordinates(txt_location, data)
 
     lat, lon = None, None
     if data:
@@ -124,8 +56,6 @@ def main():
     # ADD AN INPUT FIELD FOR THE TOTAL BEDROOMS
     total_bedrooms = st.sidebar.number_input(label='Total Bedrooms', placeholder='e.g 2', step=1, min_value=1)
 
-    population = get_city_population(city_name=txt_location)
-
     # ADD AN INPUT FIELD FOR THE POPULATION
     st.sidebar.number_input(label='Population (in millions)', value=population, disabled=True)
 
@@ -147,16 +77,19 @@ def main():
         st.title('Curious about your home’s value?') # h1 tag
         st.write("Use our AI-powered predictor to get a quick and reliable price estimate.") # p tag
 
-        if model_info()['status'] == "Healthy":
+        # ONE HEALTH CHECK PER RENDER, SHARED BY THE GATE BELOW AND THE METRICS AT THE BOTTOM
+        info = wait(info_request, deadline) or {"status": "Unhealthy", "version": "-", "accuracy": 0}
+
+        if info['status'] == "Healthy":
+            # THE PREDICTION IS MADE ONCE, BELOW, WHEN THE BUTTON REPORTS A CLICK
             if st.button(
                 label="Predict", 
-                on_click=predict, 
-                args=(lat, lon, median_age, total_rooms, total_bedrooms, population, total_households, median_income, ocean_proximity),
                 type='secondary'
             ):
                 
                 with st.spinner(text="Calculating your house value..."):
-                    house_value = predict(
+                    house_value = run(predict(
+                        client,
                         latitude=lat, longitude=lon,
                         housing_median_age=median_age,
                         total_rooms=total_rooms,
@@ -165,7 +98,7 @@ def main():
                         households=total_households,
                         median_income=median_income,
                         ocean_proximity=ocean_proximity
-                    )
+                    ))
                     st.success(f"Your house is likely to be worth ${house_value}.", icon='🔥')
 
         else:
@@ -177,13 +110,13 @@ def main():
     col1, col2, col3, col4 = st.columns(4)
 
     with col1:
-        st.metric(label='Status', value=f"{model_info()['status']}", delta_color="red")
+        st.metric(label='Status', value=f"{info['status']}", delta_color="red")
         
     with col2:
-        st.metric(label='Version', value=f"{model_info()['version']}", delta_color="green")
+        st.metric(label='Version', value=f"{info['version']}", delta_color="green")
 
     with col3:
-        st.metric(label="Accuracy", value=f"{ model_info()['accuracy'] }%", delta_color="red")
+        st.metric(label="Accuracy", value=f"{ info['accuracy'] }%", delta_color="red")
 
     with col4:
         st.metric(label="Last Train Date", value=f"{datetime.now().strftime("%Y-%m-%d")}", delta_color="green")
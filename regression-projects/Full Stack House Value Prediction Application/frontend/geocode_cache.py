@@ -0,0 +1,125 @@
+import asyncio
+import json
+import os
+import pathlib
+import sqlite3
+import time
+from typing import Optional
+
+import pandas as pd
+
+# CITY -> (lat, lon) TABLE BUILT ONCE FROM THE DEMOGRAPHICS SHEET (SEE build_coordinates_table)
+CITY_COORDINATES = 'california_city_coordinates.csv'
+
+# ON-DISK CACHE OF NOMINATIM RESPONSES FOR ANYTHING NOT IN THE TABLE
+GEOCODE_CACHE_PATH = os.getenv("GEOCODE_CACHE_PATH", "cache/geocode.sqlite")
+GEOCODE_CACHE_TTL_SECONDS = float(os.getenv("GEOCODE_CACHE_TTL_DAYS", "30")) * 24 * 60 * 60
+
+# NOMINATIM'S USAGE POLICY ALLOWS ONE REQUEST PER SECOND
+NOMINATIM_MIN_INTERVAL = 1.0
+
+
+def load_coordinates_table(path: str = CITY_COORDINATES) -> dict:
+    """
+    This function is responsible for reading the prebuilt city coordinates.
+
+    Parameters:
+        - path: CSV with name, lat and lon columns
+
+    Returns:
+        - Dictionary of city name to a Nominatim-style result list, empty if there is no table
+    """
+    if not pathlib.Path(path).exists():
+        return {}
+
+    df = pd.read_csv(path, dtype={'lat': str, 'lon': str}).dropna()
+    return {name: [{'lat': lat, 'lon': lon}] for name, lat, lon in zip(df['name'], df['lat'], df['lon'])}
+
+
+class GeocodeCache:
+    """
+    This class is responsible for keeping geocoding responses in a SQLite file, so a city is only
+    looked up over the network once per TTL, across reruns, sessions and restarts. Empty responses
+    are cached as well, so unknown places do not hit the network on every rerun either.
+    """
+
+    def __init__(self, path: str = GEOCODE_CACHE_PATH, ttl_seconds: float = GEOCODE_CACHE_TTL_SECONDS):
+        self.path = pathlib.Path(path)
+        self.ttl = ttl_seconds
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS geocode (query TEXT PRIMARY KEY, response TEXT NOT NULL, fetched_at REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        # ONE SHORT-LIVED CONNECTION PER CALL, SINCE STREAMLIT RUNS EVERY SESSION ON ITS OWN THREAD
+        return sqlite3.connect(self.path, timeout=5)
+
+    def get(self, query: str) -> Optional[list]:
+        """
+        This function is responsible for returning a cached response that has not expired.
+
+        Parameters:
+            - query: The geocoding query, e.g. a city name
+
+        Returns:
+            - The cached response, or None on a miss
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT response, fetched_at FROM geocode WHERE query = ?", (query,)
+            ).fetchone()
+
+        if row is None or time.time() - row[1] > self.ttl:
+            return None
+        return json.loads(row[0])
+
+    def put(self, query: str, response: list):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO geocode (query, response, fetched_at) VALUES (?, ?, ?)",
+                (query, json.dumps(response), time.time())
+            )
+
+
+def build_coordinates_table(path: str = CITY_COORDINATES):
+    """
+    This function is responsible for geocoding every city in the demographics sheet once and
+    saving the coordinates, so the frontend never has to geocode a city from the list at runtime.
+    Lookups go through the cache and are spaced out to respect Nominatim's rate limit, so an
+    interrupted run can simply be started again.
+
+    Parameters:
+        - path: Destination CSV
+    """
+    import httpx
+    from utils import fetch_coordinates, load_cities
+
+    async def build() -> list:
+        cache = GeocodeCache()
+        rows = []
+        async with httpx.AsyncClient(timeout=10) as client:
+            for name in load_cities()['name']:
+                data = cache.get(name)
+                if data is None:
+                    try:
+                        data = await fetch_coordinates(client, name)
+                    except httpx.HTTPError as e:
+                        print(f'Skipped {name}: {e}')
+                        continue
+                    cache.put(name, data)
+                    await asyncio.sleep(NOMINATIM_MIN_INTERVAL)
+
+                if data:
+                    rows.append({'name': name, 'lat': data[0]['lat'], 'lon': data[0]['lon']})
+                else:
+                    print(f'Skipped {name}: not found')
+        return rows
+
+    rows = asyncio.run(build())
+    pd.DataFrame(rows, columns=['name', 'lat', 'lon']).to_csv(path, index=False)
+    print(f'Saved {len(rows)} cities to {path}')
+
+if __name__ == "__main__":
+    build_coordinates_table()
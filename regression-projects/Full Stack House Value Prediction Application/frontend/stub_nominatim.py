@@ -0,0 +1,60 @@
+"""
+A stand-in for the Nominatim search API, for running the frontend without network access or
+without spending Nominatim's rate limit. Cities in the prebuilt coordinates table get their real
+coordinates, anything else gets a fixed point inside California, and names listed with
+--not-found return an empty result.
+
+    python stub_nominatim.py --port 8090
+    NOMINATIM_URL=http://localhost:8090/search streamlit run app.py
+"""
+import argparse
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from geocode_cache import load_coordinates_table
+
+
+class StubNominatimHandler(BaseHTTPRequestHandler):
+    coordinates = {}
+    not_found = set()
+    delay = 0.0
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path.rstrip('/') != '/search':
+            self.send_error(404)
+            return
+
+        query = parse_qs(url.query).get('q', [''])[0]
+        if query in self.not_found:
+            data = []
+        else:
+            # THE STATE CAPITOL, FOR ANY PLACE THAT IS NOT IN THE TABLE
+            data = self.coordinates.get(query, [{'lat': '38.5767', 'lon': '-121.4934'}])
+
+        time.sleep(self.delay)
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--delay', type=float, default=0.0, help='Seconds to wait before answering, to mimic network latency')
+    parser.add_argument('--not-found', nargs='*', default=[], help='Queries that return an empty result')
+    args = parser.parse_args()
+
+    StubNominatimHandler.coordinates = load_coordinates_table()
+    StubNominatimHandler.not_found = set(args.not_found)
+    StubNominatimHandler.delay = args.delay
+
+    server = ThreadingHTTPServer((args.host, args.port), StubNominatimHandler)
+    print(f'Stub Nominatim listening on http://{args.host}:{args.port}/search')
+    server.serve_forever()
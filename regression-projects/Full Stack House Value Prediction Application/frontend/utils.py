@@ -1,15 +1,22 @@
 import streamlit as st
 import os
-import requests
+import httpx
 import pandas as pd
 from dotenv import load_dotenv
-import time
+import pathlib
+
+from api_client import MAX_RETRIES, with_backoff
+from geocode_cache import GeocodeCache, load_coordinates_table
 
 
 load_dotenv()
 NOMINATIM_URL = os.getenv("NOMINATIM_URL")
 
-def get_location_coordinates(location: str, max_retries=3):
+# SOURCE SPREADSHEET AND THE CLEANED TABLE BUILT FROM IT (SEE build_city_table)
+CITIES_EXCEL = 'california_demographics_by_city.xlsx'
+CITIES_PARQUET = 'california_cities.parquet'
+
+async def fetch_coordinates(client: httpx.AsyncClient, location: str, max_retries=MAX_RETRIES):
     params = {
         "q": location,
         "format": "json",
@@ -20,53 +27,77 @@ def get_location_coordinates(location: str, max_retries=3):
         "User-Agent": "house-price-predictor (gracedemus@outlook.com)"
     }
 
-    try:
-        for attempt in range(max_retries):
-            response = requests.get(
-                url=f"{NOMINATIM_URL}",
-                params=params,
-                headers=headers,
-                timeout=5
-            )
-            response.raise_for_status()
-            data = response.json()
-
-            if data is not None:
-                return data
-            time.sleep(5)
-        return None
-    
-    except requests.exceptions.Timeout:
-        st.warning("The request timed out. Try again later.")
-        return None
-
-    except requests.exceptions.ConnectionError:
-        st.warning("Could not connect to the geocoding service. Check your internet.")
-        return None
-
-    except requests.exceptions.HTTPError as e:
-        st.warning(f"HTTP error: {e}")
-        return None
-
-    except Exception as e:
-        st.warning(f"An unexpected error occurred: {e}")
-        return None
+    # TIMEOUTS, DROPPED CONNECTIONS AND 429/5xx ARE RETRIED WITH EXPONENTIAL BACKOFF
+    response = await with_backoff(
+        lambda: client.get(f"{NOMINATIM_URL}", params=params, headers=headers),
+        max_retries=max_retries
+    )
+    return response.json()
 
-def load_cities():
-    df = pd.read_excel('california_demographics_by_city.xlsx')
-    df = df.loc[df['name'].str.contains('city')]
+@st.cache_resource
+def city_coordinates() -> dict:
+    return load_coordinates_table()
+
+@st.cache_resource
+def geocode_cache() -> GeocodeCache:
+    return GeocodeCache()
+
+def cached_coordinates(location: str):
+    # PREBUILT TABLE FIRST, THEN THE ON-DISK CACHE. None MEANS THE NETWORK HAS TO BE ASKED
+    data = city_coordinates().get(location)
+    if data is not None:
+        return data
+
+    return geocode_cache().get(location)
+
+def remember_coordinates(location: str, data):
+    if data is not None:
+        geocode_cache().put(location, data)
+
+def clean_cities(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.loc[df['name'].str.contains('city')].copy()
     df['name'] = df['name'].str.replace('city', '')
     df['name'] = df['name'].str.strip()
-    df.drop(columns=['state', 'city'], axis=1, inplace=True)
+    df.drop(columns=['state', 'city'], inplace=True)
+
+    return df.reset_index(drop=True)
+
+def build_city_table(excel_path: str = CITIES_EXCEL, parquet_path: str = CITIES_PARQUET) -> pd.DataFrame:
+    """
+    This function is responsible for cleaning the demographics spreadsheet once and saving the
+    city table as Parquet, which loads far faster than Excel. It runs when the image is built.
+    """
+    df = clean_cities(pd.read_excel(excel_path))
+    df.to_parquet(parquet_path, index=False)
 
     return df
 
+@st.cache_data
+def load_cities():
+    # USE THE PARQUET TABLE BUILT WITH THE IMAGE, UNLESS THE SPREADSHEET HAS CHANGED SINCE
+    parquet, excel = pathlib.Path(CITIES_PARQUET), pathlib.Path(CITIES_EXCEL)
+    if parquet.exists() and (not excel.exists() or parquet.stat().st_mtime >= excel.stat().st_mtime):
+        return pd.read_parquet(parquet)
+
+    return clean_cities(pd.read_excel(excel))
+
+@st.cache_resource
+def city_populations() -> dict:
+    # CITY NAME -> POPULATION, SHARED BY EVERY SESSION. THE FIRST ROW WINS, AS BEFORE
+    df = load_cities()
+    populations = {}
+    for name, population in zip(df['name'], df['population'].tolist()):
+        populations.setdefault(name, population)
+
+    return populations
+
 def get_city_names():
     df = load_cities()
 
     return df.iloc[1:]['name']
 
 def get_city_population(city_name: str):
-    df = load_cities()
+    return city_populations()[city_name]
 
-    return df.loc[df['name']==city_name]['population'].values[0]
+if __name__ == "__main__":
+    build_city_table()
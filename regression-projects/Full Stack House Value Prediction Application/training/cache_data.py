@@ -0,0 +1,115 @@
+import hashlib
+import json
+import os
+import pathlib
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from load_data import import_data
+from process_data import CATEGORIES_ORDER
+from profiling import peak_rss_mib, profiler
+
+# BUMP WHEN THE CACHED LAYOUT OR ENCODING CHANGES, SO OLD CACHES ARE IGNORED
+CACHE_VERSION = 3
+
+# DOWNCAST DTYPES USED WHEN PARSING THE CSV
+HOUSING_DTYPES = {
+    "longitude": "float32",
+    "latitude": "float32",
+    "housing_median_age": "float32",
+    "total_rooms": "float32",
+    "total_bedrooms": "float32",
+    "population": "float32",
+    "households": "float32",
+    "median_income": "float32",
+    "median_house_value": "float32",
+    "ocean_proximity": "category",
+}
+
+
+def file_digest(filepath: object) -> str:
+    """
+    This function is responsible for hashing the contents of a file.
+
+    Parameters:
+        - filepath
+
+    Returns:
+        - SHA-256 hex digest of the file
+    """
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        # SMALL BLOCKS, SO HASHING DOES NOT SHOW UP IN THE PEAK MEMORY OF A CACHED LOAD
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@profiler.step('Cached Load')
+def load_processed_data(filepath: object, cache_dir: object = ".cache") -> pd.DataFrame:
+    """
+    This function is responsible for returning the parsed housing data as float32 columns, with
+    ocean_proximity already turned into its ordinal codes. Missing values are kept as NaN, so
+    preprocess_and_partition drops them in the same pass that splits the data. The first run parses
+    the CSV and saves the result as a column-major .npy matrix keyed by the hash of the CSV. Later runs
+    memory-map that matrix and wrap it without copying, so every column is a view of the mapped file.
+
+    Parameters:
+        - filepath: Path to the source CSV
+        - cache_dir: Directory holding the cached datasets
+
+    Returns:
+        - processed_df: Parsed data with float32 columns, ready for preprocess_and_partition
+    """
+    try:
+        # ALLOCATIONS ARE MEASURED FROM HERE, MAPPED PAGES ARE NOT ALLOCATIONS AND DO NOT COUNT
+        tracing = tracemalloc.is_tracing()
+        baseline = tracemalloc.get_traced_memory()[0] if tracing else 0
+
+        cache_dir = pathlib.Path(cache_dir)
+        key = f"housing-v{CACHE_VERSION}-{file_digest(filepath)[:16]}"
+        data_path = cache_dir / f"{key}.npy"
+        meta_path = cache_dir / f"{key}.json"
+
+        if data_path.exists() and meta_path.exists():
+            meta = json.loads(meta_path.read_text())
+            data = np.load(data_path, mmap_mode="r")
+            # copy=False KEEPS THE MEMMAP AS THE FRAME'S ONLY BLOCK, THE DEFAULT WOULD COPY IT INTO MEMORY
+            processed_df = pd.DataFrame(data, columns=meta["columns"], copy=False)
+            print(f'Cache hit: {data_path}')
+        else:
+            processed_df = import_data(filepath, dtype=HOUSING_DTYPES)
+
+            # UNKNOWN CATEGORIES GET -1 LIKE THE ENCODER'S unknown_value, MISSING ONES STAY NaN
+            categories = processed_df['ocean_proximity']
+            codes = pd.Categorical(categories, categories=CATEGORIES_ORDER[0]).codes.astype(np.float32)
+            codes[categories.isna().to_numpy()] = np.nan
+            processed_df['ocean_proximity'] = codes
+            processed_df = processed_df.astype(np.float32, copy=False)
+
+            # WRITE UNDER A TEMPORARY NAME AND SWAP IN, SO A CRASH NEVER LEAVES A HALF CACHE.
+            # COLUMN-MAJOR, SO EACH COLUMN OF THE MAPPED FRAME IS CONTIGUOUS ON DISK
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            with open(f"{data_path}.tmp", "wb") as f:
+                np.save(f, np.asfortranarray(processed_df.to_numpy()))
+            os.replace(f"{data_path}.tmp", data_path)
+            meta_path.write_text(json.dumps({
+                "source": str(filepath),
+                "rows": len(processed_df),
+                "columns": list(processed_df.columns),
+            }))
+            print(f'Cache miss, saved: {data_path}')
+
+        # THE PEAK WHILE LOADING, NOT THE SIZE OF THE RESULT, WHICH A MAPPED FRAME DOES NOT HOLD IN MEMORY
+        if tracing:
+            peak = tracemalloc.get_traced_memory()[1] - baseline
+            print(f'Rows: {len(processed_df)}, peak allocated while loading: {round(peak / 2**20, 2)} MiB')
+        else:
+            print(f'Rows: {len(processed_df)}, peak RSS: {round(peak_rss_mib(), 2)} MiB')
+
+        return processed_df
+    except Exception as e:
+        print(f'Error in load_processed_data: {e}')
+        raise e
@@ -0,0 +1,211 @@
+import json
+import os
+from datetime import datetime
+import numpy as np
+
+from cache_data import file_digest
+from profiling import profiler
+
+# SCALER AND ENCODER PARAMETERS FOR THE NUMPY RUNTIME, WHICH DOES NOT UNPICKLE SKLEARN OBJECTS
+PREPROCESSING_FILE = "preprocessing.json"
+
+# LISTS THE CHECKSUM OF EVERY ARTIFACT. THE BACKEND ONLY RELOADS WHEN THIS FILE CHANGES
+MANIFEST_FILE = "artifacts.json"
+
+# FILE LAYOUT: MAGIC | HEADER LENGTH (uint64) | JSON HEADER | PADDING | NODE TABLE
+TREES_MAGIC = b"XGBTREES"
+TREES_ALIGNMENT = 64
+NODE_DTYPE = np.dtype([
+    ("feature", "<i4"),
+    ("threshold", "<f4"),
+    ("left", "<i4"),
+    ("right", "<i4"),
+    ("missing", "<i4"),
+    ("value", "<f4"),
+])
+
+# OBJECTIVES WHOSE PREDICTION IS THE RAW MARGIN (NO LINK FUNCTION)
+IDENTITY_OBJECTIVES = {"reg:squarederror", "reg:absoluteerror", "reg:pseudohubererror"}
+
+
+def _parse_base_score(value: str) -> float:
+    # NEWER XGBOOST VERSIONS STORE THE BASE SCORE AS A VECTOR, e.g. "[2.0685E5]"
+    return float(value.strip("[]").split(",")[0])
+
+
+def flatten_trees(model) -> tuple:
+    """
+    This function is responsible for flattening the trees of a fitted XGBoost model into one node table.
+    Leaves point back at themselves, so every row can walk the same number of steps.
+
+    Parameters:
+        - model: Fitted XGBRegressor or Booster
+
+    Returns:
+        - nodes: Structured array with one entry per node across all trees
+        - header: Dictionary with the tree roots, base score and maximum depth
+    """
+    booster = model.get_booster() if hasattr(model, "get_booster") else model
+    learner = json.loads(booster.save_raw(raw_format="json"))["learner"]
+
+    objective = learner["objective"]["name"]
+    if objective not in IDENTITY_OBJECTIVES:
+        raise ValueError(f"Objective {objective} is not supported by the tree export")
+
+    gbm = learner["gradient_booster"]
+    if gbm["name"] != "gbtree":
+        raise ValueError(f"Booster {gbm['name']} is not supported by the tree export")
+
+    # ONLY KEEP THE ROUNDS predict() WOULD USE AFTER EARLY STOPPING
+    trees_per_round = int(gbm["model"]["gbtree_model_param"]["num_parallel_tree"])
+    try:
+        n_rounds = booster.best_iteration + 1
+    except AttributeError:
+        n_rounds = booster.num_boosted_rounds()
+    trees = gbm["model"]["trees"][:n_rounds * trees_per_round]
+
+    roots, depths, tables = [], [], []
+    offset = 0
+    for tree in trees:
+        if any(tree.get("split_type", [])):
+            raise ValueError("Categorical splits are not supported by the tree export")
+
+        left = np.asarray(tree["left_children"], dtype=np.int32)
+        right = np.asarray(tree["right_children"], dtype=np.int32)
+        is_leaf = left == -1
+        index = np.arange(len(left), dtype=np.int32)
+
+        table = np.zeros(len(left), dtype=NODE_DTYPE)
+        table["feature"] = np.where(is_leaf, 0, tree["split_indices"])
+        table["threshold"] = np.where(is_leaf, np.inf, tree["split_conditions"])
+        table["left"] = np.where(is_leaf, index, left) + offset
+        table["right"] = np.where(is_leaf, index, right) + offset
+        table["missing"] = np.where(
+            is_leaf, index, np.where(np.asarray(tree["default_left"], dtype=bool), left, right)
+        ) + offset
+        table["value"] = np.where(is_leaf, tree["split_conditions"], 0.0)
+
+        # DEPTH OF THE DEEPEST LEAF IN THIS TREE
+        depth = np.zeros(len(left), dtype=np.int32)
+        for node in range(len(left)):
+            if not is_leaf[node]:
+                depth[left[node]] = depth[node] + 1
+                depth[right[node]] = depth[node] + 1
+
+        roots.append(offset)
+        depths.append(int(depth.max()))
+        tables.append(table)
+        offset += len(left)
+
+    header = {
+        "format_version": 1,
+        "objective": objective,
+        "base_score": _parse_base_score(learner["learner_model_param"]["base_score"]),
+        "n_features": int(learner["learner_model_param"]["num_feature"]),
+        "n_nodes": offset,
+        "max_depth": max(depths, default=0),
+        "roots": roots,
+        "dtype": NODE_DTYPE.descr,
+    }
+    nodes = np.concatenate(tables) if tables else np.zeros(0, dtype=NODE_DTYPE)
+
+    return nodes, header
+
+
+@profiler.step('Model Export')
+def export_model(model, filepath: str = "model.trees", native_filepath: str = "model.ubj") -> None:
+    """
+    This function is responsible for exporting the trained model for serving. It writes the booster
+    in XGBoost's native UBJSON format and a flattened array-of-trees file that the backend can
+    memory-map and evaluate with NumPy alone.
+
+    Parameters:
+        - model: Fitted XGBRegressor
+        - filepath: Destination of the flattened trees
+        - native_filepath: Destination of the native XGBoost model
+    """
+    try:
+        booster = model.get_booster() if hasattr(model, "get_booster") else model
+        booster.save_model(native_filepath)
+
+        nodes, header = flatten_trees(model)
+        header_bytes = json.dumps(header).encode("utf-8")
+        prefix = len(TREES_MAGIC) + 8 + len(header_bytes)
+        padding = b" " * (-prefix % TREES_ALIGNMENT)
+
+        # WRITE TO A TEMPORARY FILE AND SWAP IT IN, SO A SERVER THAT HAS THE OLD FILE MAPPED
+        # KEEPS READING THE OLD TREES AND NEVER SEES A HALF-WRITTEN ONE
+        tmp_filepath = f"{filepath}.tmp"
+        with open(tmp_filepath, "wb") as f:
+            f.write(TREES_MAGIC)
+            f.write(np.uint64(len(header_bytes) + len(padding)).tobytes())
+            f.write(header_bytes + padding)
+            f.write(nodes.tobytes())
+        os.replace(tmp_filepath, filepath)
+
+        print(f'Trees: {len(header["roots"])}, nodes: {header["n_nodes"]}, max depth: {header["max_depth"]}')
+    except Exception as e:
+        print(f'Error in export_model: {e}')
+        raise e
+
+
+def export_preprocessing(encoder, scaler, filepath: str = PREPROCESSING_FILE) -> None:
+    """
+    This function is responsible for writing the fitted encoder categories and scaler parameters as JSON.
+    The backend rebuilds its feature pipeline from this file when serving model.trees, so that image
+    needs neither scikit-learn nor joblib. Floats are written with repr, so they round-trip exactly.
+
+    Parameters:
+        - encoder: Fitted OrdinalEncoder for ocean_proximity
+        - scaler: Fitted MinMaxScaler
+        - filepath: Destination of the parameters
+    """
+    try:
+        names = getattr(scaler, "feature_names_in_", None)
+        params = {
+            "format_version": 1,
+            "feature_names": [str(name) for name in names] if names is not None else None,
+            "categories": [str(category) for category in encoder.categories_[0]],
+            "unknown_value": (
+                float(encoder.unknown_value) if encoder.handle_unknown == "use_encoded_value" else None
+            ),
+            "scale": [float(value) for value in scaler.scale_],
+            "min": [float(value) for value in scaler.min_],
+            "clip": bool(getattr(scaler, "clip", False)),
+            "feature_range": [float(value) for value in scaler.feature_range],
+        }
+
+        tmp_filepath = f"{filepath}.tmp"
+        with open(tmp_filepath, "w") as f:
+            json.dump(params, f, indent=2)
+        os.replace(tmp_filepath, filepath)
+    except Exception as e:
+        print(f'Error in export_preprocessing: {e}')
+        raise e
+
+
+def write_manifest(filepaths: list, manifest_filepath: str = MANIFEST_FILE) -> None:
+    """
+    This function is responsible for recording the SHA-256 of every artifact of a training run.
+    It must be called after all of them have been written: the backend reloads when the manifest
+    changes and refuses any file that does not match its checksum, so it never serves a new
+    encoder or scaler next to an old model.
+
+    Parameters:
+        - filepaths: Artifacts produced by this run
+        - manifest_filepath: Destination of the manifest
+    """
+    try:
+        manifest = {
+            "created_at": datetime.now().isoformat(),
+            "files": {os.path.basename(path): file_digest(path) for path in filepaths},
+        }
+
+        # SWAP IN A COMPLETE FILE, THE BACKEND MAY READ IT AT ANY MOMENT
+        tmp_filepath = f"{manifest_filepath}.tmp"
+        with open(tmp_filepath, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_filepath, manifest_filepath)
+    except Exception as e:
+        print(f'Error in write_manifest: {e}')
+        raise e
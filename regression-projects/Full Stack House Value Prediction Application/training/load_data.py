@@ -1,18 +1,20 @@
 import pandas as pd
 import matplotlib.pyplot as plt
+from typing import Optional
 
-def import_data(filepath: object):
+def import_data(filepath: object, dtype: Optional[dict] = None):
     """
     This function is responsible for loading the data from a specific filepath.
 
     Parameters:
         - filepath
+        - dtype: Optional column dtypes, e.g. to read floats as float32
     
     Returns:
         - Dataframe containing the data
     """
     try:
-        return pd.read_csv(filepath)
+        return pd.read_csv(filepath, dtype=dtype)
     except Exception as e:
         print(f'Error in import_data: {e}')
         raise e
@@ -1,35 +1,61 @@
-from load_data import import_data
-from process_data import preprocess_data, scale_data
-from split_data import partition_data
+from cache_data import load_processed_data
+from process_data import scale_data, preprocess_and_partition
 from model_train import model_training
+from export_model import export_model, export_preprocessing, write_manifest
+from stream_train import streaming_training
+from profiling import profiler
+import argparse
 import joblib
 import pathlib
 from datetime import datetime
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--streaming', action='store_true', help='Train chunk by chunk without loading the whole dataset')
+    parser.add_argument('--chunksize', type=int, default=100_000, help='Rows per chunk in streaming mode')
+    parser.add_argument('--profile', action='store_true', help='Also dump a cProfile .prof file for every step')
+    parser.add_argument('--no-trace-memory', action='store_true', help='Skip tracemalloc, which slows allocation-heavy steps')
+    parser.add_argument('--runs-dir', default='runs', help='Where the per-run metrics JSON is written')
+    args = parser.parse_args()
+
+    profiler.configure(output_dir=args.runs_dir, trace_memory=not args.no_trace_memory, profile=args.profile)
+
     # CHECK IF THE MODEL HAS BEEN TRAINED BEFORE
     if not pathlib.Path('model.pkl').exists():
         # FILE PATH FOR OUR THE DATA
         path = './data/housing.csv'
 
-        # IMPORT THE DATA
-        df = import_data(path)
-
-        # PREPROCESSING
-        processed_df = preprocess_data(df)
-        
-        # SPLIT INTO TRAIN AND TEST SETS
-        X_train, X_test, y_train, y_test = partition_data(processed_df, target='median_house_value')
-        
-        # NORMALISE THE DATA
-        X_train_scaled, X_test_scaled = scale_data(X_train, X_test) 
-        
-        # TRAIN THE MODEL
-        fitted_model = model_training(X_train_scaled, X_test_scaled, y_train, y_test)
+        if args.streaming:
+            # TRAIN OUT OF CORE, MEMORY IS BOUNDED BY THE CHUNK SIZE
+            fitted_model = streaming_training(path, chunksize=args.chunksize)
+        else:
+            # IMPORT THE DATA, OR REUSE THE PARSED COPY CACHED BY AN EARLIER RUN
+            processed_df = load_processed_data(path)
+            
+            # DROP MISSING ROWS, ENCODE AND SPLIT INTO TRAIN AND TEST SETS IN ONE PASS, WITHOUT COPYING THE FRAME
+            X_train, X_test, y_train, y_test = preprocess_and_partition(processed_df, target='median_house_value')
+            
+            # NORMALISE THE DATA
+            X_train_scaled, X_test_scaled = scale_data(X_train, X_test) 
+            
+            # TRAIN THE MODEL
+            fitted_model = model_training(X_train_scaled, X_test_scaled, y_train, y_test)
         
         # SAVE THE MODEL
         joblib.dump(fitted_model, 'model.pkl')
         print(f'[LOGS] {datetime.now()}: Model saved!')
+
+        # EXPORT THE TREES FOR THE NUMPY RUNTIME IN THE BACKEND
+        export_model(fitted_model, 'model.trees')
+        export_preprocessing(joblib.load('encoder.pkl'), joblib.load('scaler.pkl'), 'preprocessing.json')
+        print(f'[LOGS] {datetime.now()}: Model exported!')
+
+        # PUBLISH THE NEW SET LAST, THE BACKEND RELOADS WHEN THE MANIFEST CHANGES
+        write_manifest(['model.pkl', 'model.trees', 'model.ubj', 'preprocessing.json', 'scaler.pkl', 'encoder.pkl'])
+        print(f'[LOGS] {datetime.now()}: Manifest written!')
+
+        # SAVE THE STEP METRICS OF THIS RUN
+        profiler.save()
     else:
         print(f'[LOGS] {datetime.now()}: Loading Model')
 
@@ -6,11 +6,39 @@ import time
 from sklearn.metrics import mean_absolute_percentage_error
 
 import os
+import threading
+from typing import Optional, Tuple, Union
+
+from profiling import profiler
 os.environ['LC_ALL'] = 'en_US.UTF-8'
 
-def hyperparameter_tuning(X_train, X_test, y_train, y_test):
+# CORES THIS PROCESS MAY RUN ON, WHICH RESPECTS CPU PINNING (e.g. docker --cpuset-cpus).
+# SAME COUNT AS backend/config.py, os.cpu_count() WOULD REPORT EVERY CORE ON THE HOST
+CPU_COUNT = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+
+# UPPER BOUND OF THE n_estimators SEARCH SPACE
+MAX_ROUNDS = 500
+
+# NUMBER OF HISTOGRAM BINS, SHARED BY THE QUANTILE MATRICES AND EVERY BOOSTER
+MAX_BIN = 256
+
+# BOOSTER SETTINGS THAT ARE NOT PART OF THE SEARCH
+FIXED_PARAMS = {
+    "objective": "reg:squarederror",
+    # EARLY STOPPING WATCHES THE LAST METRIC, SO IT STAYS ON RMSE (THE DEFAULT FOR THIS OBJECTIVE).
+    # MAPE IS ONLY EVALUATED FOR THE PRUNER, ON THE SAME SCALE AS THE VALUE THE OBJECTIVE RETURNS
+    "eval_metric": ["mape", "rmse"],
+    "tree_method": "hist",
+    "max_bin": MAX_BIN,
+    "verbosity": 0,
+}
+
+@profiler.step('Quantization')
+def build_matrices(X_train, X_test, y_train, y_test) -> Tuple[xgb.QuantileDMatrix, xgb.QuantileDMatrix]:
     """
-    This function is responsible for determining the best parameters for the XGBoost model
+    This function is responsible for quantizing the features once. The test matrix reuses the bin
+    edges of the training matrix, and every trial and the final fit train on these same bins instead
+    of re-quantizing the data each time.
 
     Args:
         X_train (np.ndarray): These are the features that will be used as part of the training dataset.
@@ -18,16 +46,152 @@ def hyperparameter_tuning(X_train, X_test, y_train, y_test):
         y_train (np.array): These are the labels that will be used as part of the training dataset.
         y_test (np.array): These are the features that will be used to make predictions using the trained model.
 
+    Returns:
+        tuple: Training and test QuantileDMatrix
+    """
+    dtrain = xgb.QuantileDMatrix(X_train, label=y_train, max_bin=MAX_BIN)
+    dtest = xgb.QuantileDMatrix(X_test, label=y_test, ref=dtrain)
+
+    return dtrain, dtest
+
+def choose_parallelism(n_trials: int, n_cores: Optional[int] = None) -> Tuple[int, int]:
+    """
+    This function is responsible for splitting the available cores between concurrent trials and
+    the threads each booster uses. The housing data is small, so one thread per booster with many
+    trials side by side scales better than a few trials with many threads each. Boosters only get
+    extra threads when there are more cores than trials.
+
+    Args:
+        n_trials (int): Number of trials the study will run.
+        n_cores (int, optional): Cores to use. Defaults to every core this process may run on.
+
+    Returns:
+        tuple: Number of trials to run at once and the number of threads per booster
+    """
+    n_cores = n_cores or CPU_COUNT
+    trial_jobs = max(1, min(n_cores, n_trials))
+    booster_threads = max(1, n_cores // trial_jobs)
+
+    return trial_jobs, booster_threads
+
+class PruningCallback(xgb.callback.TrainingCallback):
+    """
+    Reports the evaluation MAPE to Optuna while a booster trains and stops the trial as soon as
+    the pruner decides it cannot beat the trials that came before it.
+    """
+
+    def __init__(self, trial: optuna.Trial, report_every: int = 10):
+        self.trial = trial
+        self.report_every = report_every
+
+    def after_iteration(self, model, epoch, evals_log) -> bool:
+        if (epoch + 1) % self.report_every == 0:
+            # SAME SCALE AS THE VALUE THE OBJECTIVE RETURNS
+            mape = evals_log["eval"]["mape"][-1] * 100
+            self.trial.report(mape, step=epoch + 1)
+            if self.trial.should_prune():
+                raise optuna.TrialPruned(f'Pruned at round {epoch + 1} with MAPE {round(mape, 2)}%')
+        return False
+
+class TimingCallback(xgb.callback.TrainingCallback):
+    """
+    Records how long a booster takes to finish its first round, which includes its setup cost,
+    and how long it takes to train overall.
+    """
+
+    def __init__(self, trial: optuna.Trial):
+        self.trial = trial
+        self.start_time = None
+
+    def before_training(self, model):
+        self.start_time = time.perf_counter()
+        return model
+
+    def after_iteration(self, model, epoch, evals_log) -> bool:
+        if epoch == 0:
+            self.trial.set_user_attr("first_round_seconds", time.perf_counter() - self.start_time)
+        return False
+
+    def after_training(self, model):
+        self.trial.set_user_attr("train_seconds", time.perf_counter() - self.start_time)
+        return model
+
+def build_pruner(name: str, max_rounds: int) -> optuna.pruners.BasePruner:
+    """
+    This function is responsible for creating the Optuna pruner used to stop unpromising trials early.
+
+    Args:
+        name (str): One of "median", "hyperband", "successive_halving" or "none".
+        max_rounds (int): Largest number of boosting rounds a trial can train for.
+
+    Returns:
+        optuna.pruners.BasePruner: The pruner
+    """
+    if name == "median":
+        # 10 FULL TRIALS BEFORE ANY PRUNING AND NOTHING PRUNED BEFORE ROUND 200, SO SLOW LEARNERS THAT
+        # FINISH BEST ARE NOT CUT EARLY. AT 150 TRIALS THIS MATCHED OR BEAT NO PRUNING ON EVERY SEED TRIED
+        return optuna.pruners.MedianPruner(n_startup_trials=10, n_warmup_steps=200)
+    if name == "hyperband":
+        return optuna.pruners.HyperbandPruner(min_resource=50, max_resource=max_rounds)
+    if name == "successive_halving":
+        return optuna.pruners.SuccessiveHalvingPruner(min_resource=50)
+    if name == "none":
+        return optuna.pruners.NopPruner()
+    raise ValueError(f'Unknown pruner: {name}')
+
+def hyperparameter_tuning(
+    X_train, X_test, y_train, y_test,
+    n_trials: int = 150,
+    timeout: int = 600,
+    n_cores: Optional[int] = None,
+    storage: Optional[Union[str, optuna.storages.BaseStorage]] = None,
+    study_name: Optional[str] = None,
+    pruner: str = "median",
+    seed: Optional[int] = None,
+    matrices: Optional[Tuple[xgb.DMatrix, xgb.DMatrix]] = None
+    ):
+    """
+    This function is responsible for determining the best parameters for the XGBoost model.
+    Trials run in parallel across the available cores. Passing a storage (e.g. "sqlite:///optuna.db")
+    also lets several processes or machines running this function share the same study.
+    Each booster reports its evaluation MAPE every few rounds, so a pruner can stop trials that are
+    clearly losing instead of training them to the end. The default median pruner cuts the search time by about
+    a quarter without losing best MAPE at the default 150 trials (see benchmark_pruning.py); much smaller
+    searches are better run with pruner="none". The booster of the best trial is kept, so it does not need
+    to be trained again.
+
+    Args:
+        X_train (np.ndarray): These are the features that will be used as part of the training dataset.
+        X_test (np.ndarray): These are the features that will be used to make predictions using the trained model.
+        y_train (np.array): These are the labels that will be used as part of the training dataset.
+        y_test (np.array): These are the features that will be used to make predictions using the trained model.
+        n_trials (int): Number of trials to run.
+        timeout (int): Stop the search after this many seconds.
+        n_cores (int, optional): Cores to use. Defaults to every core this process may run on.
+        storage (str, optional): Optuna storage (or its URL) shared between worker processes.
+        study_name (str, optional): Name of the study inside the storage.
+        pruner (str): One of "median" (default), "hyperband", "successive_halving" or "none".
+        seed (int, optional): Seed for the sampler, for comparable runs.
+        matrices (tuple, optional): Training and test matrices from build_matrices, to share with the caller.
+
     Returns:
         dict: Returns the best parameters for the XGBoost model
+        xgb.Booster: Booster of the best trial, or None if that trial ran in another process
+        int: Best boosting round of the best trial, as found by early stopping
     """
-    dtrain = xgb.DMatrix(X_train, label=y_train)
-    dtest = xgb.DMatrix(X_test, label=y_test)
+    trial_jobs, booster_threads = choose_parallelism(n_trials, n_cores)
+    print(f'Running {trial_jobs} trials at a time with {booster_threads} thread(s) per booster')
+
+    dtrain, dtest = matrices or build_matrices(X_train, X_test, y_train, y_test)
+
+    # BEST BOOSTER SEEN BY THIS PROCESS, SHARED BY THE TRIAL THREADS
+    best = {"number": None, "value": float("inf"), "booster": None}
+    best_lock = threading.Lock()
 
     def objective(trial):
 
         param = {
-            "objective": "reg:squarederror",
+            **FIXED_PARAMS,
             "colsample_bytree": trial.suggest_float("colsample_bytree", 0.2, 1.0),
             "subsample": trial.suggest_float("subsample", 0.6, 1.0),
             "learning_rate": trial.suggest_float("learning_rate", 0.01, 0.3),
@@ -37,12 +201,10 @@ def hyperparameter_tuning(X_train, X_test, y_train, y_test):
             "grow_policy": trial.suggest_categorical(
                 "grow_policy", ["depthwise", "lossguide"]
             ),
-            "tree_method": "hist",
-            "n_jobs": 1,
-            "verbosity": 0,
+            "n_jobs": booster_threads,
         }
 
-        n_estimators = trial.suggest_int("n_estimators", 100, 500)
+        n_estimators = trial.suggest_int("n_estimators", 100, MAX_ROUNDS)
 
         model = xgb.train(
             param,
@@ -50,43 +212,112 @@ def hyperparameter_tuning(X_train, X_test, y_train, y_test):
             num_boost_round=n_estimators,
             evals=[(dtest, "eval")],
             early_stopping_rounds=20,
-            verbose_eval=False
+            verbose_eval=False,
+            callbacks=[TimingCallback(trial), PruningCallback(trial)]
         )
 
-        preds = model.predict(dtest)
+        # SCORE THE ROUNDS THE MODEL WILL ACTUALLY KEEP, NOT THE ONES EARLY STOPPING THREW AWAY
+        preds = model.predict(dtest, iteration_range=(0, model.best_iteration + 1))
         mape = mean_absolute_percentage_error(y_test, preds) * 100
 
+        trial.set_user_attr("best_iteration", model.best_iteration)
+        with best_lock:
+            if mape < best["value"]:
+                best.update(number=trial.number, value=mape, booster=model)
+
         return mape
 
-    study = optuna.create_study(direction="minimize")
-    study.optimize(objective, n_trials=150, timeout=600)
+    study = optuna.create_study(
+        direction="minimize",
+        storage=storage,
+        study_name=study_name,
+        load_if_exists=storage is not None,
+        sampler=optuna.samplers.TPESampler(seed=seed),
+        pruner=build_pruner(pruner, max_rounds=MAX_ROUNDS)
+    )
+
+    # XGBOOST RELEASES THE GIL WHILE TRAINING, SO THREADED TRIALS RUN ON SEPARATE CORES
+    start_time = time.time()
+    previous_trials = len(study.trials)
+    study.optimize(objective, n_trials=n_trials, timeout=timeout, n_jobs=trial_jobs)
+    total_time = time.time() - start_time
 
+    states = [t.state for t in study.trials[previous_trials:]]
+    completed = states.count(optuna.trial.TrialState.COMPLETE)
+    pruned = states.count(optuna.trial.TrialState.PRUNED)
     print()
+    print(f'Completed trials: {completed}, pruned trials: {pruned} in {round(total_time, 2)}s ({round(len(states) / total_time * 60, 2)} trials/minute)')
+    timed = [t.user_attrs for t in study.trials[previous_trials:] if "first_round_seconds" in t.user_attrs]
+    if timed:
+        first_round = np.mean([attrs["first_round_seconds"] for attrs in timed])
+        print(f'Mean first round (incl. setup): {round(first_round * 1000, 2)}ms')
+
+    # PRUNED TRIALS NEVER REACH after_training, SO ONLY TRIALS THAT FINISHED HAVE A TRAIN TIME
+    finished = [t.user_attrs["train_seconds"] for t in study.trials[previous_trials:] if "train_seconds" in t.user_attrs]
+    if finished:
+        print(f'Mean trial train time: {round(np.mean(finished), 4)}s over {len(finished)} finished trials')
     print(f'Best RSME: {study.best_value}')
     print(f'Best params: {study.best_params}\n')
 
-    return study.best_params
+    best_trial = study.best_trial
+    best_booster = best["booster"] if best["number"] == best_trial.number else None
+
+    return study.best_params, best_booster, best_trial.user_attrs["best_iteration"]
 
+@profiler.step('Model Train')
 def model_training(
     X_train: np.ndarray,
     X_test: np.ndarray,
     y_train: np.ndarray,
     y_test: np.ndarray,
+    refit: bool = False
     ):
+    """
+    This function is responsible for tuning the XGBoost model and returning the final fitted model.
+    By default the best booster from the search is reused as is, cut down to its best round.
+
+    Args:
+        X_train (np.ndarray): These are the features that will be used as part of the training dataset.
+        X_test (np.ndarray): These are the features that will be used to make predictions using the trained model.
+        y_train (np.array): These are the labels that will be used as part of the training dataset.
+        y_test (np.array): These are the features that will be used to make predictions using the trained model.
+        refit (bool): Train the final model once on the train and test sets together, for the number
+            of rounds the search found, instead of reusing the search booster.
 
+    Returns:
+        xgb.XGBRegressor: The fitted model
+    """
     try:
-        print('************ Starting Model Train Step ************\n')
-        start_time = time.time()
-
-        best_params = hyperparameter_tuning(X_train, X_test, y_train, y_test)
-        model = xgb.XGBRegressor(params=best_params)
-        model.fit(X_train, y_train)
-
-        # DISPLAY PERFORMANCE METRICS
-        end_time = time.time()
-        total_time = end_time - start_time
-        print(f'Total time taken: {round(total_time, 4)}s')
-        print('------------------------------------\n')
+        dtrain, dtest = build_matrices(X_train, X_test, y_train, y_test)
+        best_params, best_booster, best_iteration = hyperparameter_tuning(
+            X_train, X_test, y_train, y_test, matrices=(dtrain, dtest)
+        )
+        n_rounds = best_iteration + 1
+
+        params = {**FIXED_PARAMS, **best_params}
+        params.pop("n_estimators")
+
+        if refit:
+            # ONE FINAL FIT ON ALL THE DATA, NO EARLY STOPPING SINCE THE ROUND COUNT IS KNOWN.
+            # THE SEARCH'S BIN EDGES ARE REUSED, SO THE DATA IS NOT SKETCHED AGAIN
+            dall = xgb.QuantileDMatrix(
+                np.vstack([X_train, X_test]),
+                label=np.concatenate([y_train, y_test]),
+                ref=dtrain
+            )
+            booster = xgb.train(params, dall, num_boost_round=n_rounds)
+        elif best_booster is None:
+            # THE BEST TRIAL RAN IN ANOTHER PROCESS, SO TRAIN ITS CONFIGURATION ONCE HERE
+            booster = xgb.train(params, dtrain, num_boost_round=n_rounds)
+        else:
+            # DROP THE ROUNDS TRAINED AFTER THE BEST ONE
+            booster = best_booster[:n_rounds]
+
+        # WRAP THE BOOSTER SO THE REST OF THE PIPELINE KEEPS ITS XGBRegressor INTERFACE
+        model = xgb.XGBRegressor()
+        model.load_model(bytearray(booster.save_raw(raw_format="ubj")))
+
+        print(f'Boosting rounds: {n_rounds}')
 
         return model
     except Exception as e:
@@ -2,35 +2,54 @@ import pandas as pd
 import numpy as np
 from typing import Tuple, Optional, Union
 from sklearn.preprocessing import OrdinalEncoder, MinMaxScaler
+from sklearn.model_selection import ShuffleSplit
 import joblib
-import time
+
+from profiling import profiler
+
+# ORDER OF THE ocean_proximity CODES
+CATEGORIES_ORDER = [['<1H OCEAN', 'INLAND', 'NEAR OCEAN', 'NEAR BAY', 'ISLAND']]
+
+def build_encoder() -> OrdinalEncoder:
+    """
+    This function is responsible for creating the ocean_proximity encoder. The categories are fixed,
+    so it is fitted without looking at the data.
+
+    Returns:
+        - Fitted OrdinalEncoder
+    """
+    encoder = OrdinalEncoder(categories=CATEGORIES_ORDER, handle_unknown="use_encoded_value", unknown_value=-1)
+    return encoder.fit(pd.DataFrame({'ocean_proximity': CATEGORIES_ORDER[0]}))
 
 def encode_data(
     data: Union[pd.DataFrame | list],
-    ordinal_cols: Optional[list]
+    ordinal_cols: Optional[list],
+    encoder_filepath: Optional[str] = "encoder.pkl"
     ) -> Union[np.ndarray | pd.DataFrame]:
     """
     This function is responsible for converting categorical data into numeric data.
 
     Parameters:
         - series: This is the array of data to be converted into numerical data.
+        - encoder_filepath: Where the fitted encoder is saved, None to skip saving it
 
     Returns:
         - 
     """
-    categories_order = [['<1H OCEAN', 'INLAND', 'NEAR OCEAN', 'NEAR BAY', 'ISLAND']]
     # INITIALIZE THE ONEHOT ENCODER OBJECT
-    encoder = OrdinalEncoder(categories=categories_order, handle_unknown="use_encoded_value", unknown_value=-1)
+    encoder = OrdinalEncoder(categories=CATEGORIES_ORDER, handle_unknown="use_encoded_value", unknown_value=-1)
 
     if (isinstance(data, pd.DataFrame)) & (ordinal_cols is not None):
         for ordinal_col in ordinal_cols:
             data[ordinal_col] = encoder.fit_transform(data[[ordinal_col]])
         
-        joblib.dump(encoder, "encoder.pkl")
+        if encoder_filepath is not None:
+            joblib.dump(encoder, encoder_filepath)
         return data
     else:
         return encoder.fit_transform(data)
 
+@profiler.step('Scaling')
 def scale_data(X_train: pd.DataFrame, X_test: pd.DataFrame):
     """
     This function is responsible for normalizing the data into a common range (usually between 0 and 1).
@@ -49,34 +68,100 @@ def scale_data(X_train: pd.DataFrame, X_test: pd.DataFrame):
 
     return X_train, X_test
 
-def preprocess_data(df: pd.DataFrame):
+@profiler.step('Preprocessing')
+def preprocess_data(df: pd.DataFrame, encoder_filepath: Optional[str] = "encoder.pkl"):
     """
     This function is responsible for perform preprocessing tasks such as handling missing values.
 
     Parameters:
         - df: This is the data to be processed.
+        - encoder_filepath: Where the fitted encoder is saved, None to skip saving it (e.g. in benchmarks)
 
     Returns:
         - processed_df: This is the processed data.
     """
     if df is not None:
         try:
-            print('************ Starting Preprocessing Step ************\n')
-            start_time = time.time()
-
             # REMOVE THE EMPTY ROWS FROM OUR DATASET
             processed_df = df.dropna()
 
             # CONVERT CATEGORICAL DATA INTO NUMERICAL DATA
-            processed_df = encode_data(processed_df, ordinal_cols=['ocean_proximity'])
-
-            # DISPLAY PERFORMANCE METRICS
-            end_time = time.time()
-            total_time = end_time - start_time
-            print(f'Total time taken: {round(total_time, 4)}s')
-            print('------------------------------------\n')
+            processed_df = encode_data(processed_df, ordinal_cols=['ocean_proximity'], encoder_filepath=encoder_filepath)
 
             return processed_df
         except Exception as e:
             print(f'Error in process_data: {e}')
-            raise e
\ No newline at end of file
+            raise e
+
+@profiler.step('Fused Preprocessing')
+def preprocess_and_partition(
+    df: pd.DataFrame,
+    target: str,
+    ordinal_col: str = 'ocean_proximity',
+    test_size: float = 0.2,
+    random_state: int = 42,
+    encoder_filepath: Optional[str] = "encoder.pkl"
+    ) -> Tuple[pd.DataFrame, pd.DataFrame, pd.Series, pd.Series]:
+    """
+    This function is responsible for doing what preprocess_data followed by partition_data does, in one pass
+    over the column buffers. Missing rows are masked out, the categorical column is encoded, and every column
+    is gathered straight into its train and test matrices, so no intermediate DataFrame is ever copied.
+    The split is the same one train_test_split makes with the same random_state.
+
+    Parameters:
+        - df: Raw data, or data that is already encoded
+        - target: Name of the label column
+        - ordinal_col: Name of the categorical column
+        - test_size: Fraction of rows that go to the test set
+        - random_state: Random seed for the split
+        - encoder_filepath: Where the encoder is saved, None to skip saving it (e.g. in benchmarks)
+
+    Returns:
+        - X_train, X_test, y_train, y_test
+    """
+    try:
+        features = [col for col in df.columns if col != target]
+        numeric_cols = [col for col in df.columns if col != ordinal_col]
+
+        # ONE VALIDITY MASK ACROSS ALL COLUMNS, BUILT IN PLACE
+        valid = df[ordinal_col].notna().to_numpy().copy()
+        for col in numeric_cols:
+            valid &= ~np.isnan(df[col].to_numpy())
+        rows = np.flatnonzero(valid)
+
+        # ENCODE THE CATEGORICAL COLUMN UNLESS IT ALREADY HOLDS CODES (e.g. FROM THE DATASET CACHE)
+        categorical = df[ordinal_col]
+        if pd.api.types.is_numeric_dtype(categorical):
+            codes = categorical.to_numpy()
+        else:
+            # UNKNOWN CATEGORIES GET -1, THE SAME AS THE ENCODER'S unknown_value
+            codes = pd.Categorical(categorical, categories=CATEGORIES_ORDER[0]).codes
+
+        if encoder_filepath is not None:
+            joblib.dump(build_encoder(), encoder_filepath)
+
+        # SAME PERMUTATION train_test_split WOULD DRAW FOR THIS MANY ROWS
+        splitter = ShuffleSplit(n_splits=1, test_size=test_size, random_state=random_state)
+        train_idx, test_idx = next(splitter.split(np.empty((len(rows), 1))))
+        train_rows, test_rows = rows[train_idx], rows[test_idx]
+
+        # COLUMN-MAJOR, SO EVERY GATHER WRITES A CONTIGUOUS COLUMN AND PANDAS CAN WRAP IT WITHOUT COPYING
+        dtype = np.result_type(*[df[col].dtype for col in numeric_cols])
+        X_train = np.empty((len(train_rows), len(features)), dtype=dtype, order='F')
+        X_test = np.empty((len(test_rows), len(features)), dtype=dtype, order='F')
+        for j, col in enumerate(features):
+            values = (codes if col == ordinal_col else df[col].to_numpy()).astype(dtype, copy=False)
+            np.take(values, train_rows, out=X_train[:, j], mode='clip')
+            np.take(values, test_rows, out=X_test[:, j], mode='clip')
+
+        y = df[target].to_numpy()
+        index = df.index.to_numpy()
+        X_train = pd.DataFrame(X_train, columns=features, index=index[train_rows], copy=False)
+        X_test = pd.DataFrame(X_test, columns=features, index=index[test_rows], copy=False)
+        y_train = pd.Series(y[train_rows], index=X_train.index, name=target)
+        y_test = pd.Series(y[test_rows], index=X_test.index, name=target)
+
+        return X_train, X_test, y_train, y_test
+    except Exception as e:
+        print(f'Error in preprocess_and_partition: {e}')
+        raise e
@@ -0,0 +1,183 @@
+import cProfile
+import functools
+import json
+import pathlib
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Optional
+
+
+def peak_rss_mib() -> float:
+    # ru_maxrss IS IN KILOBYTES ON LINUX AND BYTES ON MACOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+class RunProfiler:
+    """
+    This class is responsible for measuring every pipeline step of a training run. Each step records
+    its wall time, CPU time, peak RSS and the bytes it allocated (via tracemalloc), and the whole run
+    is written to one JSON file so runs can be compared across commits. With profile=True every step
+    is also run under cProfile and dumped as a .prof file (readable by pstats, snakeviz etc).
+
+    tracemalloc is only started for the outermost step and stopped again when it ends. If something
+    else is already tracing (e.g. a benchmark measuring its own peak), the steps leave it alone and
+    skip their memory metrics, since resetting its peak would corrupt that measurement.
+    """
+
+    def __init__(self, output_dir: str = "runs", trace_memory: bool = True, profile: bool = False):
+        self.output_dir = pathlib.Path(output_dir)
+        self.trace_memory = trace_memory
+        self.profile = profile
+        self.run_id = datetime.now().strftime("%Y%m%d-%H%M%S")
+        self.steps = []
+        self._stack = []
+        self._owns_tracing = False
+
+    def configure(self, output_dir: Optional[str] = None, trace_memory: Optional[bool] = None, profile: Optional[bool] = None):
+        if output_dir is not None:
+            self.output_dir = pathlib.Path(output_dir)
+        if trace_memory is not None:
+            self.trace_memory = trace_memory
+        if profile is not None:
+            self.profile = profile
+
+    def _update_parent_peaks(self):
+        # tracemalloc HAS ONE PEAK COUNTER, SO CARRY IT UP TO THE ENCLOSING STEPS BEFORE IT IS RESET
+        _, peak = tracemalloc.get_traced_memory()
+        for frame in self._stack:
+            frame["peak"] = max(frame["peak"], peak)
+
+    @contextmanager
+    def track(self, name: str):
+        """
+        This function is responsible for measuring the code inside a with-block as one pipeline step.
+
+        Parameters:
+            - name: Name of the step, e.g. "Preprocessing"
+        """
+        print(f'************ Starting {name} Step ************\n')
+
+        started_tracing = False
+        if self.trace_memory and not self._stack and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracing = started_tracing = True
+        tracing = self._owns_tracing
+
+        frame = {"peak": 0, "baseline": 0}
+        if tracing:
+            # THE PEAK IS OURS TO RESET, THE ENCLOSING STEPS KEEP THEIRS IN THEIR FRAMES
+            self._update_parent_peaks()
+            frame["baseline"] = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        self._stack.append(frame)
+
+        profiler = cProfile.Profile() if self.profile and not cProfile_active() else None
+        record = {"step": name, "started_at": datetime.now().isoformat(), "status": "ok"}
+        rss_before = peak_rss_mib()
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield record
+        except BaseException as e:
+            record["status"] = "failed"
+            record["error"] = f"{e}"
+            raise
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            wall_time = time.perf_counter() - wall_start
+            cpu_time = time.process_time() - cpu_start
+
+            self._stack.pop()
+            if tracing:
+                _, peak = tracemalloc.get_traced_memory()
+                frame["peak"] = max(frame["peak"], peak)
+                for parent in self._stack:
+                    parent["peak"] = max(parent["peak"], frame["peak"])
+                record["allocated_peak_mib"] = round((frame["peak"] - frame["baseline"]) / 2**20, 3)
+            if started_tracing:
+                # LEAVE tracemalloc OFF AGAIN, AS IT WAS BEFORE THE OUTERMOST STEP
+                tracemalloc.stop()
+                self._owns_tracing = False
+
+            record["wall_time_s"] = round(wall_time, 4)
+            record["cpu_time_s"] = round(cpu_time, 4)
+            record["peak_rss_mib"] = round(peak_rss_mib(), 2)
+            record["rss_growth_mib"] = round(record["peak_rss_mib"] - rss_before, 2)
+
+            if profiler is not None:
+                self.output_dir.mkdir(parents=True, exist_ok=True)
+                prof_path = self.output_dir / f"{self.run_id}-{name.lower().replace(' ', '_')}.prof"
+                profiler.dump_stats(prof_path)
+                record["profile"] = str(prof_path)
+
+            self.steps.append(record)
+
+            # DISPLAY PERFORMANCE METRICS
+            print(f'Total time taken: {record["wall_time_s"]}s (CPU {record["cpu_time_s"]}s)')
+            if tracing:
+                print(f'Peak allocated: {record["allocated_peak_mib"]} MiB, peak RSS: {record["peak_rss_mib"]} MiB')
+            print('------------------------------------\n')
+
+    def step(self, name: str):
+        """
+        This function is responsible for turning a pipeline function into a measured step.
+
+        Parameters:
+            - name: Name of the step, e.g. "Preprocessing"
+
+        Returns:
+            - Decorator
+        """
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.track(name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def save(self) -> pathlib.Path:
+        """
+        This function is responsible for writing every step recorded so far to runs/<run_id>.json.
+
+        Returns:
+            - Path of the JSON file
+        """
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        path = self.output_dir / f"{self.run_id}.json"
+        path.write_text(json.dumps({
+            "run_id": self.run_id,
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "argv": sys.argv,
+            "steps": self.steps,
+        }, indent=2))
+        print(f'[LOGS] {datetime.now()}: Run metrics saved to {path}')
+        return path
+
+
+def cProfile_active() -> bool:
+    # ONLY ONE cProfile PROFILER CAN BE ENABLED AT A TIME, SO NESTED STEPS ARE COVERED BY THEIR PARENT
+    return sys.getprofile() is not None
+
+
+# SHARED BY EVERY TRAINING MODULE SO ONE RUN ENDS UP IN ONE FILE
+profiler = RunProfiler()
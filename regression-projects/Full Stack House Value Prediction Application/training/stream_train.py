@@ -0,0 +1,168 @@
+import os
+import tempfile
+from typing import Iterator, Optional, Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.preprocessing import MinMaxScaler, OrdinalEncoder
+
+from cache_data import HOUSING_DTYPES
+from model_train import FIXED_PARAMS
+from process_data import build_encoder
+from profiling import profiler
+
+# USED WHEN NO TUNED PARAMETERS ARE PASSED IN
+DEFAULT_PARAMS = {
+    "learning_rate": 0.1,
+    "max_depth": 8,
+    "subsample": 0.8,
+    "colsample_bytree": 0.8,
+}
+
+
+def iter_chunks(
+    filepath: object,
+    target: str,
+    encoder: OrdinalEncoder,
+    chunksize: int,
+    test_size: float,
+    seed: int
+    ) -> Iterator[Tuple[pd.DataFrame, pd.Series, np.ndarray]]:
+    """
+    This function is responsible for streaming the CSV one cleaned and encoded chunk at a time.
+    Every row is assigned to the train or test set by a random draw seeded with the chunk number,
+    so each pass over the file produces the same split.
+
+    Parameters:
+        - filepath: Path to the source CSV
+        - target: Name of the label column
+        - encoder: Fitted OrdinalEncoder for ocean_proximity
+        - chunksize: Rows read per chunk
+        - test_size: Fraction of rows that go to the test set
+        - seed: Random seed for the split
+
+    Returns:
+        - Iterator of (features, labels, is_test mask) per chunk
+    """
+    chunks = pd.read_csv(filepath, dtype=HOUSING_DTYPES, chunksize=chunksize)
+    for chunk_number, chunk in enumerate(chunks):
+        chunk = chunk.dropna()
+        chunk['ocean_proximity'] = encoder.transform(chunk[['ocean_proximity']]).astype(np.float32)
+
+        is_test = np.random.default_rng([seed, chunk_number]).random(len(chunk)) < test_size
+        yield chunk.drop(columns=[target]), chunk[target], is_test
+
+
+class HousingChunkIter(xgb.DataIter):
+    """
+    Feeds one side of the train/test split to XGBoost chunk by chunk, scaled with the streamed scaler.
+    XGBoost pages the quantized data to disk under cache_prefix, so memory stays bounded by the chunk size.
+    """
+
+    def __init__(self, chunk_source, scaler: MinMaxScaler, test: bool, cache_prefix: str):
+        self.chunk_source = chunk_source
+        self.scaler = scaler
+        self.test = test
+        self._chunks = None
+        super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data) -> bool:
+        if self._chunks is None:
+            self._chunks = self.chunk_source()
+
+        for X, y, is_test in self._chunks:
+            mask = is_test if self.test else ~is_test
+            if mask.any():
+                input_data(
+                    data=self.scaler.transform(X[mask]).astype(np.float32),
+                    label=y[mask].to_numpy()
+                )
+                return True
+        return False
+
+    def reset(self) -> None:
+        self._chunks = None
+
+
+@profiler.step('Streaming Train')
+def streaming_training(
+    filepath: object,
+    target: str = 'median_house_value',
+    chunksize: int = 100_000,
+    test_size: float = 0.2,
+    params: Optional[dict] = None,
+    num_boost_round: int = 500,
+    seed: int = 42,
+    cache_dir: Optional[str] = None
+    ) -> xgb.XGBRegressor:
+    """
+    This function is responsible for training the model without ever holding the whole dataset in memory.
+    A first pass over the CSV fits the scaler with partial_fit, then XGBoost reads the encoded and scaled
+    chunks through an external-memory QuantileDMatrix. Peak memory grows with the chunk size, not the file size.
+
+    Parameters:
+        - filepath: Path to the source CSV
+        - target: Name of the label column
+        - chunksize: Rows read per chunk
+        - test_size: Fraction of rows held out for early stopping
+        - params: Booster parameters, e.g. the best parameters from an earlier search
+        - num_boost_round: Most boosting rounds to train
+        - seed: Random seed for the split
+        - cache_dir: Where XGBoost pages its external-memory cache. Defaults to a temporary directory
+
+    Returns:
+        - Fitted XGBRegressor
+    """
+    try:
+        # THE CATEGORIES ARE FIXED, SO THE ENCODER NEEDS NO PASS OVER THE DATA
+        encoder = build_encoder()
+
+        def chunk_source():
+            return iter_chunks(filepath, target, encoder, chunksize, test_size, seed)
+
+        # PASS 1: FIT THE SCALER ON THE TRAINING ROWS, ONE CHUNK AT A TIME
+        scaler = MinMaxScaler()
+        train_rows, test_rows = 0, 0
+        for X, _, is_test in chunk_source():
+            scaler.partial_fit(X[~is_test])
+            train_rows += int((~is_test).sum())
+            test_rows += int(is_test.sum())
+        print(f'Train rows: {train_rows}, test rows: {test_rows}')
+
+        # PASS 2: BUILD THE EXTERNAL-MEMORY MATRICES AND TRAIN
+        with tempfile.TemporaryDirectory(dir=cache_dir) as tmp_dir:
+            dtrain = xgb.ExtMemQuantileDMatrix(
+                HousingChunkIter(chunk_source, scaler, test=False, cache_prefix=os.path.join(tmp_dir, 'train'))
+            )
+            dtest = xgb.ExtMemQuantileDMatrix(
+                HousingChunkIter(chunk_source, scaler, test=True, cache_prefix=os.path.join(tmp_dir, 'test')),
+                ref=dtrain
+            )
+
+            evals_result = {}
+            booster = xgb.train(
+                {**FIXED_PARAMS, **(params or DEFAULT_PARAMS)},
+                dtrain,
+                num_boost_round=num_boost_round,
+                evals=[(dtest, "eval")],
+                evals_result=evals_result,
+                early_stopping_rounds=20,
+                verbose_eval=False
+            )
+
+        # SAVE THE SCALER AND ENCODER TO USE LATER, LIKE THE IN-MEMORY PIPELINE DOES
+        joblib.dump(encoder, "encoder.pkl")
+        joblib.dump(scaler, "scaler.pkl")
+
+        model = xgb.XGBRegressor()
+        model.load_model(bytearray(booster[:booster.best_iteration + 1].save_raw(raw_format="ubj")))
+
+        mape = evals_result["eval"]["mape"][booster.best_iteration]
+        print(f'Boosting rounds: {booster.best_iteration + 1}, eval MAPE: {round(mape * 100, 2)}%')
+
+        return model
+    except Exception as e:
+        print(f'Error in streaming_training: {e}')
+        raise e
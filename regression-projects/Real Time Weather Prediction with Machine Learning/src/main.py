@@ -1,6 +1,7 @@
 import requests
 import pandas as pd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder
 from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
@@ -16,6 +17,13 @@ API_KEY = "<YOUR_API_KEY>" # REPLACE WITH YOUR OWN API KEY
 # BASE_URL
 BASE_URL = "https://api.openweathermap.org/data/2.5/"
 
+# 16 COMPASS POINTS, 22.5° EACH. N COVERS 348.75° - 11.25°, SO IT WRAPS AROUND 0°
+COMPASS_POINTS = np.array([
+    "N", "NNE", "NE", "ENE", "E", "ESE", "SE", "SSE",
+    "S", "SSW", "SW", "WSW", "W", "WNW", "NW", "NNW"
+])
+COMPASS_BIN_EDGES = np.arange(11.25, 360, 22.5)
+
 def fetch_weather_data(city):
     """
     This function is responsible for fetching the weather data for a particular city.
@@ -78,7 +86,7 @@ def data_preprocessing():
     Returns:
         - X: Feature variable
         - y: Target variable
-        - encoder: LabelEncoder object
+        - encoder: LabelEncoder fitted on WindGustDir
     """
     try:
         filename = r'..\dataset\weather.csv'
@@ -88,10 +96,10 @@ def data_preprocessing():
         df = df.dropna()
         df.drop_duplicates()
         
-        # ENCODE CATEGORICAL DATA
+        # ENCODE CATEGORICAL DATA. THE WIND DIRECTION ENCODER IS RETURNED TO ENCODE LIVE DATA THE SAME WAY
         encoder = LabelEncoder()
         df['WindGustDir'] = encoder.fit_transform(df['WindGustDir'])
-        df['RainTomorrow'] = encoder.fit_transform(df['RainTomorrow'])
+        df['RainTomorrow'] = LabelEncoder().fit_transform(df['RainTomorrow'])
         
         # SEPARATE THE FEATURE AND TARGET VARIABLE
         X = df.drop(['RainTomorrow'], axis=1)
@@ -101,6 +109,38 @@ def data_preprocessing():
     except Exception as e:
         print('Error in data_processing: ', e)
         
+def degrees_to_compass(degrees, encoder=None):
+    """
+    This function is responsible for converting wind directions in degrees to compass points.
+    A whole array of observations is converted in one call.
+    
+    Parameters:
+        - degrees: Wind direction in degrees, a single value or an array
+        - encoder: Optional LabelEncoder fitted on WindGustDir
+        
+    Returns:
+        - Array of compass points, or of their encoded values (-1 for points the encoder never saw) when an encoder is given.
+          Missing directions stay missing: None among the points, NaN among the encoded values
+    """
+    try:
+        degrees = np.asarray(degrees, dtype=float)
+        missing = np.isnan(degrees)
+        
+        # EDGES START AT 11.25°, SO 348.75° - 360° LANDS IN BIN 16, WHICH WRAPS BACK TO N.
+        # NaN WOULD ALSO LAND IN BIN 16, SO MISSING DIRECTIONS ARE MASKED OUT BELOW INSTEAD OF BECOMING N
+        index = np.digitize(np.mod(degrees, 360), COMPASS_BIN_EDGES) % len(COMPASS_POINTS)
+        if encoder is None:
+            points = COMPASS_POINTS[index]
+            return np.where(missing, None, points) if missing.any() else points
+        
+        # ENCODE THE 16 POINTS ONCE, THEN LOOK UP EVERY OBSERVATION
+        known = np.isin(COMPASS_POINTS, encoder.classes_)
+        codes = np.full(len(COMPASS_POINTS), -1)
+        codes[known] = encoder.transform(COMPASS_POINTS[known])
+        return np.where(missing, np.nan, codes[index]) if missing.any() else codes[index]
+    except Exception as e:
+        print('Error in degrees_to_compass: ', e)
+        
 def classifier_model_development(X, y):
     """
     This function is responsible for training and evaluating a RandomForestClassifier.
@@ -132,27 +172,85 @@ def classifier_model_development(X, y):
     except Exception as e:
         print('Error in classifier_model_development: ', e)
         
-def prepare_regression_data(df, feature):
+def lag_features(values, lags=1, windows=()):
+    """
+    This function is responsible for building lag, rolling mean and rolling standard deviation features in one pass.
+    The lags are a strided view of the input and the rolling statistics come from running totals, so no per-row Python loop runs.
+    
+    Parameters:
+        - values: 1D array of one feature, or 2D array with one column per feature
+        - lags: Number of lags, 1 means only the current value
+        - windows: Rolling window sizes (at least 2) for the mean and the sample standard deviation
+        
+    Returns:
+        - 2D array with one row per time step that has a full history (the first max(lags, windows) - 1 steps are dropped).
+          Columns are the lags of every feature (most recent first), then the rolling means, then the rolling standard deviations
+    """
+    # CHECKED OUTSIDE THE try SO A BAD ARGUMENT REACHES THE CALLER: A LAG BELOW 1 MISALIGNS THE COLUMNS
+    # AND A WINDOW OF 1 DIVIDES BY ZERO IN THE SAMPLE STANDARD DEVIATION
+    if lags < 1:
+        raise ValueError(f'lags must be at least 1, got {lags}')
+    if any(window < 2 for window in windows):
+        raise ValueError(f'windows must all be at least 2, got {tuple(windows)}')
+    
+    try:
+        values = np.asarray(values, dtype=float)
+        if values.ndim == 1:
+            values = values.reshape(-1, 1)
+        
+        # (ROWS, FEATURES, HISTORY) VIEW OF THE SAME MEMORY, OLDEST VALUE FIRST
+        history = max((lags, *windows))
+        view = sliding_window_view(values, history, axis=0)
+        n_rows = view.shape[0]
+        
+        lag_block = view[..., :-lags - 1:-1].reshape(n_rows, -1)
+        if not windows:
+            return lag_block
+        
+        # ROLLING SUMS FROM RUNNING TOTALS, O(n) WHATEVER THE WINDOW SIZE. VALUES ARE CENTRED FIRST
+        # SO THE SUM OF SQUARES DOES NOT LOSE PRECISION
+        offset = values.mean(axis=0)
+        centred = values - offset
+        totals = np.zeros((len(values) + 1, values.shape[1]))
+        squared_totals = np.zeros_like(totals)
+        np.cumsum(centred, axis=0, out=totals[1:])
+        np.cumsum(centred ** 2, axis=0, out=squared_totals[1:])
+        
+        means, stds = [], []
+        for window in windows:
+            sums = totals[history:] - totals[history - window:len(totals) - window]
+            squared_sums = squared_totals[history:] - squared_totals[history - window:len(totals) - window]
+            means.append(sums / window + offset)
+            stds.append(np.sqrt(np.maximum(squared_sums - sums ** 2 / window, 0) / (window - 1)))
+        return np.hstack([lag_block, *means, *stds])
+    except Exception as e:
+        print('Error in lag_features: ', e)
+
+def prepare_regression_data(df, feature, lags=1, windows=()):
     """
     This function is responsible for preparing the data for training a RandomForestRegressor.
     
     Parameters:
         - df: Preprocessed DataFrame bject
-        - feature: Column name to be used for regression
+        - feature: Column name to be used for regression, or a list of column names (the first one is predicted)
+        - lags: Number of past values of each feature to use, see lag_features
+        - windows: Rolling window sizes, see lag_features
         
     Returns:
         - X: 2D array containing the features
         - y: 1D array containing the target
     """
     try:
-        X, y = [], []
-        for i in range(len(df) - 1):
-            X.append(df[feature].iloc[i])
-            y.append(df[feature].iloc[i+1])
+        features = [feature] if isinstance(feature, str) else list(feature)
+        values = df[features].to_numpy(dtype=float)
         
-        X = np.array(X).reshape(-1,1)
-        y = np.array(y)
+        # FEATURES UP TO TIME t PREDICT THE FIRST FEATURE AT TIME t + 1
+        X = lag_features(values, lags=lags, windows=windows)[:-1]
+        y = values[len(values) - len(X):, 0]
         return X, y
+    except ValueError:
+        # INVALID lags OR windows FROM lag_features, THE CALLER HAS TO FIX ITS ARGUMENTS
+        raise
     except Exception as e:
         print('Error in prepare_regression_data: ', e)
         
@@ -226,18 +324,8 @@ def weather_view():
     historical_data, X, y, encoder = data_preprocessing()
     rain_model = classifier_model_development(X=X, y=y) # trains a classifier
     
-    wind_deg = current_weather['wind_gust_dir'] % 360
-    compass_points = [
-        ("N", 0, 11.25), ("NNE", 11.25, 33.75), ("NE", 33.75, 56.25),
-        ("ENE", 56.25, 78.75), ("E", 78.75, 101.25), ("ESE", 101.25, 123.75),
-        ("SE", 123.75, 146.25), ("SSE", 146.25, 168.75), ("S", 168.75, 191.25),
-        ("SSW", 191.25, 213.75), ("SW", 213.75, 236.25), ("WSW", 236.25, 258.75),
-        ("W", 258.75, 281.25), ("WNW", 281.25, 303.75), ("NW", 303.75, 326.25),
-        ("NNW", 326.25, 348.75)
-    ]
-    compass_direction = next(point for point, start, end in compass_points if start < wind_deg < end)
-    
-    compass_direction_encoded = encoder.transform([compass_direction])[0] if compass_direction in encoder.classes_ else -1
+    # A MISSING GUST DIRECTION IS PASSED ON AS NaN RATHER THAN GUESSED
+    compass_direction_encoded = degrees_to_compass(current_weather['wind_gust_dir'], encoder=encoder).item()
     
     current_data = {
         'MinTemp': current_weather['temp_min'],